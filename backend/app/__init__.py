@@ -9,13 +9,19 @@ from flask_cors import CORS
 app = Flask(__name__)
 app.config.from_object(Config)
 
+from app.utils.http_utils import SpoolingRequest
+app.request_class = SpoolingRequest
+
+from app.utils.logging_utils import configure_logging
+configure_logging(app.config['LOG_LEVEL'])
+
 # Configure CORS with specific settings
 CORS(app, resources={
     r"/*": {
         "origins": ["*"],
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
-        "expose_headers": ["Content-Type", "Authorization", "X-Podcast-Duration", "X-Podcast-Title", "X-Podcast-Description", "X-Podcast-Source-Count"],
+        "allow_headers": ["Content-Type", "Authorization", "If-None-Match", "X-Profile"],
+        "expose_headers": ["Content-Type", "Authorization", "X-Podcast-Duration", "X-Podcast-Title", "X-Podcast-Description", "X-Podcast-Source-Count", "X-Podcast-Script-Id", "X-Podcast-Script-Cached", "X-Segment-Count", "ETag", "X-Next-Cursor", "Server-Timing", "X-Profile-Id"],
         "supports_credentials": True,
         "max_age": 600
     }
@@ -30,18 +36,38 @@ jwt = JWTManager(app)
 
 migrate=Migrate(app, db)
 
+from app.utils.metrics import init_metrics
+init_metrics(app)
+
+from app.utils.profiling import init_profiling
+init_profiling(app)
+
 from app.models.user import User
 from app.models.notebook import Notebook
 from app.models.source import Source
 from app.models.chat import Chat
+from app.models.podcast import PodcastScript
+from app.models.chat_memory import ChatMemory
+from app.models.notebook_digest import NotebookDigest
+from app.models.answer_cache import AnswerCache
 
 # Import and register controllers
 from app.controllers.auth_controller import register, login, change_password, forgot_password, reset_password, logout, generate_new_token
 from app.controllers.notebook_controller import create_notebook, get_notebooks, update_notebook, delete_notebook, get_notebook
-from app.controllers.source_controller import add_source, get_sources, update_source, delete_source, get_source
+from app.controllers.source_controller import add_source, bulk_add_sources, get_sources, update_source, delete_source, get_source
 from app.controllers.chat_controller import send_chat_message, get_chat_messages, delete_chat_message
-from app.controllers.podcast_controller import generate_podcast
+from app.controllers.podcast_controller import generate_podcast, render_podcast
+from app.controllers.health_controller import liveness, readiness
+from app.controllers.admin_controller import get_profiles, get_profile
+
+
+# Health routes
+app.add_url_rule('/health', 'liveness', liveness, methods=['GET'])
+app.add_url_rule('/ready', 'readiness', readiness, methods=['GET'])
 
+# Admin routes
+app.add_url_rule('/admin/profiles', 'get_profiles', get_profiles, methods=['GET'])
+app.add_url_rule('/admin/profiles/<profile_id>', 'get_profile', get_profile, methods=['GET'])
 
 # Auth routes
 app.add_url_rule('/register', 'register', register, methods=['POST'])
@@ -61,6 +87,7 @@ app.add_url_rule('/notebooks/<int:notebook_id>', 'delete_notebook', delete_noteb
 
 # Source routes
 app.add_url_rule('/sources', 'add_source', add_source, methods=['POST'])
+app.add_url_rule('/sources/bulk', 'bulk_add_sources', bulk_add_sources, methods=['POST'])
 app.add_url_rule('/sources/<int:notebook_id>', 'get_sources', get_sources, methods=['GET'])
 app.add_url_rule('/single-source/<int:source_id>', 'get_source', get_source, methods=['GET'])
 app.add_url_rule('/sources/<int:source_id>', 'update_source', update_source, methods=['PUT'])
@@ -73,3 +100,4 @@ app.add_url_rule('/chat/<int:notebook_id>', 'delete_chat_message', delete_chat_m
 
 # Podcast routes
 app.add_url_rule('/api/podcast/generate/<int:notebook_id>', 'generate_podcast', generate_podcast, methods=['POST', 'OPTIONS'])
+app.add_url_rule('/api/podcast/render/<int:script_id>', 'render_podcast', render_podcast, methods=['POST', 'OPTIONS'])
@@ -0,0 +1,36 @@
+import os
+from flask import jsonify, send_from_directory
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import app
+from app.models.user import User
+from app.utils.profiling import list_profiles
+
+
+def _current_user_is_admin():
+    user = User.query.get(int(get_jwt_identity()))
+    return bool(user and user.role == "admin")
+
+
+@jwt_required()
+def get_profiles():
+    """
+    List the most recent request profiles.
+    """
+    if not _current_user_is_admin():
+        return jsonify(error="Admin access required"), 403
+    return jsonify(profiles=list_profiles(app.config["PROFILE_DIR"])), 200
+
+
+@jwt_required()
+def get_profile(profile_id):
+    """
+    Download one profile as collapsed stacks, ready for a flamegraph tool.
+    """
+    if not _current_user_is_admin():
+        return jsonify(error="Admin access required"), 403
+    file_name = f"{os.path.basename(profile_id)}.collapsed"
+    if not os.path.exists(os.path.join(app.config["PROFILE_DIR"], file_name)):
+        return jsonify(error="Profile not found"), 404
+    return send_from_directory(
+        os.path.abspath(app.config["PROFILE_DIR"]), file_name, mimetype="text/plain"
+    )
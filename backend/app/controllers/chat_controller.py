@@ -6,11 +6,43 @@ from app.models.chat import Chat
 from app.models.notebook import Notebook
 from app.models.source import Source
 from app.helper.ai_generate import openai_generate, ollama32_generate, generate_summary
-from app.utils.embed_and_search import search_across_indices
+from app.utils.embed_and_search import search_across_indices, create_embedding
+from app.utils.http_utils import conditional_json, parse_limit
+from app.utils.conversation_memory import build_conversation_history
+from app.models.chat_memory import ChatMemory
+from app.utils.notebook_digest import get_notebook_digest
+from app.utils.context_packer import pack_context
+from app.utils.answer_cache import lookup_answer, store_answer, invalidate_notebook_answers
+from app.utils.metrics import current_timer, stage
+from app.utils.profiling import track_worker
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import contextvars
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Worker threads for the I/O and CPU bound chat stages that overlap with DB work
+chat_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="chat")
+
+
+def _submit(func, *args, **kwargs):
+    # Run in the request's context so stage timings land in its timer
+    # and a profiled request samples the worker thread too
+    return chat_executor.submit(contextvars.copy_context().run, track_worker, func, *args, **kwargs)
 
 
 @jwt_required()
 def send_chat_message():
+    """
+    Answer a chat query as a pipeline of overlapping stages.
+
+    The query embedding is computed while the notebook and sources load, and
+    retrieval starts as soon as both are ready; the conversation history is
+    built, the answer cache checked and the user message persisted while it
+    runs, so the LLM call starts as soon as its context is ready. Stage
+    durations are returned in ``timings`` (milliseconds).
+    """
     data = request.get_json()
     query = data.get("query")
     is_regenerate = data.get("regenerate", False)
@@ -18,6 +50,8 @@ def send_chat_message():
     source_ids = data.get("source_ids", [])
     language = data.get("language", "en")  # Default to English if not specified
     context = ""
+    # Committed before the LLM call; removed again if no reply is stored
+    unanswered_message_id = None
 
     if not query:
         return jsonify(error="Query is required"), 400
@@ -29,89 +63,84 @@ def send_chat_message():
         # Get current user ID from JWT token
         current_user_id = get_jwt_identity()
 
-        # Verify notebook exists and belongs to user
-        notebook = Notebook.query.filter_by(
-            id=notebook_id, user_id=current_user_id
-        ).first()
-        if not notebook:
-            return jsonify(error="Notebook not found or unauthorized access"), 403
+        # The query embedding only needs the query, start it right away
+        embedding_future = _submit(create_embedding, query)
+
+        with stage("db"):
+            # Verify notebook exists and belongs to user
+            notebook = Notebook.query.filter_by(
+                id=notebook_id, user_id=current_user_id
+            ).first()
+            if not notebook:
+                return jsonify(error="Notebook not found or unauthorized access"), 403
+
+            # Verify sources exist and belong to the notebook
+            sources = []
+            if source_ids:
+                sources = Source.query.filter(
+                    Source.id.in_(source_ids), Source.notebook_id == notebook_id
+                ).all()
+
+            # A notebook without chats has no history to build
+            has_history = (
+                db.session.query(Chat.id).filter_by(notebook_id=notebook_id).first() is not None
+            )
 
-        # Verify sources exist and belong to the notebook
-        source_titles = []
         used_source_titles = []
-        if source_ids:
-            sources = Source.query.filter(
-                Source.id.in_(source_ids), Source.notebook_id == notebook_id
-            ).all()
-
-            # If some sources were deleted, we'll still proceed with the available ones
-            if sources:
-                # source_titles = [source.title for source in sources]
-                # Get file_ids for searching
-                file_ids = [source.file_id for source in sources if source.file_id]
-
-                # Search across the selected sources
-                if file_ids:
-                    search_results = search_across_indices(query, file_ids, top_k=5)
-
-                    if search_results:
-                        print("-------------search found in embeddings--------------")
-
-                        # Create a map for quick title lookup
-                        file_id_to_title = {
-                            source.file_id: source.title
-                            for source in sources
-                            if source.file_id in file_ids
+        query_embedding = embedding_future.result()
+
+        # Search across the selected sources in the background
+        file_ids = [source.file_id for source in sources if source.file_id]
+        search_future = None
+        if file_ids and query_embedding is not None:
+            search_future = _submit(
+                search_across_indices, query, file_ids, top_k=10, query_embedding=query_embedding
+            )
+
+        # Earlier turns, so follow-up questions keep their context; built
+        # while retrieval runs since folding old turns may call the LLM
+        history = ""
+        if has_history:
+            with stage("history"):
+                history = build_conversation_history(notebook_id)
+
+        # Near-identical questions over the same sources, asked after the
+        # same conversation, reuse the stored answer
+        if query_embedding is not None and not is_regenerate:
+            with stage("answer_cache"):
+                cached_answer = lookup_answer(notebook_id, sources, language, history, query_embedding)
+            if cached_answer:
+                db.session.add(Chat(notebook_id=notebook_id, message=query, role="user", sources=[]))
+                assistant_message = Chat(
+                    notebook_id=notebook_id,
+                    message=cached_answer.reply,
+                    role="assistant",
+                    sources=cached_answer.sources,
+                )
+                db.session.add(assistant_message)
+                with stage("db"):
+                    db.session.commit()
+                if search_future:
+                    search_future.cancel()
+                return (
+                    jsonify(
+                        {
+                            "reply": cached_answer.reply,
+                            "message_id": assistant_message.id,
+                            "sources": cached_answer.sources,
+                            "cached": True,
+                            "timings": current_timer().to_dict(),
+                            "warning": (
+                                "Some selected sources were deleted"
+                                if source_ids and not sources
+                                else None
+                            ),
                         }
+                    ),
+                    200,
+                )
 
-                        # Build context using only relevant sources
-                        context = "\n\n".join(
-                            [
-                                f"Relevant content from {file_id_to_title.get(result['file_id'], 'Unknown')}:\n{result['chunk']}"
-                                for result in search_results
-                            ]
-                        )
-
-                        # Track used sources for transparency/logging
-                        used_file_ids = set(
-                            result["file_id"] for result in search_results
-                        )
-                        used_source_titles = [
-                            file_id_to_title.get(fid, "Unknown")
-                            for fid in used_file_ids
-                        ]
-
-                    else:
-                        print(
-                            "-------------NO relevant embeddings found, falling back to summaries--------------"
-                        )
-                        # Fallback: use summaries of all provided sources
-                        context = "\n\n".join(
-                            [
-                                f"Summary of {source.title}:\n{source.description}"
-                                for source in sources
-                            ]
-                        )
-                        context = generate_summary(context, True)
-                        used_source_titles = [source.title for source in sources]
-
-                else:
-                    print(
-                        "-------------NO file_ids available, using fallback summaries--------------"
-                    )
-                    context = "\n\n".join(
-                        [
-                            f"Summary of {source.title}:\n{source.description}"
-                            for source in sources
-                        ]
-                    )
-                    context = generate_summary(context, True)
-                    used_source_titles = [source.title for source in sources]
-            else:
-                # If all sources were deleted, we'll use an empty context
-                context = ""
-
-        # Save user message first
+        # Persist the user message while retrieval runs
         user_message = Chat(
             notebook_id=notebook_id,
             message=query,
@@ -119,10 +148,50 @@ def send_chat_message():
             sources=[],  # User messages don't have sources
         )
         db.session.add(user_message)
+        with stage("db"):
+            db.session.commit()
+        unanswered_message_id = user_message.id
+
+        # If some sources were deleted, we'll still proceed with the available ones
+        if sources:
+            search_results = search_future.result() if search_future else []
+
+            if search_results:
+                logger.debug("search found in embeddings", extra={"results": len(search_results)})
+
+                # Create a map for quick title lookup
+                file_id_to_title = {
+                    source.file_id: source.title
+                    for source in sources
+                    if source.file_id in file_ids
+                }
+
+                # Build context using only relevant sources, merged and within the token budget
+                with stage("context"):
+                    context, used_file_ids = pack_context(
+                        search_results,
+                        file_id_to_title,
+                        app.config.get("CHAT_CONTEXT_TOKEN_BUDGET", 3000),
+                    )
+
+                # Track used sources for transparency/logging
+                used_source_titles = [
+                    file_id_to_title.get(fid, "Unknown")
+                    for fid in used_file_ids
+                ]
+
+            else:
+                logger.debug("no relevant embeddings found, falling back to summaries")
+                # Fallback: use the cached digest of all provided sources
+                with stage("digest"):
+                    context = get_notebook_digest(notebook_id, sources)
+                used_source_titles = [source.title for source in sources]
 
         # Prepare the messages for OpenAI with language instruction
         prompt = f"Context: {context}\n\nQuestion: {query}\n\nPlease respond in {language} language."
-        print(f"Prompt: {prompt}")
+        if history:
+            prompt = f"{history}\n\n{prompt}"
+        logger.debug("chat prompt", extra={"prompt": prompt})
 
         # Extract the assistant's response
         reply = openai_generate(prompt, is_regenerate)
@@ -136,7 +205,16 @@ def send_chat_message():
             sources=used_source_titles,  # Store only the titles of sources that were actually used
         )
         db.session.add(assistant_message)
-        db.session.commit()
+        if query_embedding is not None:
+            store_answer(
+                notebook_id, sources, language, history, query, query_embedding, reply, used_source_titles
+            )
+        with stage("db"):
+            db.session.commit()
+        unanswered_message_id = None
+
+        timings = current_timer().to_dict()
+        logger.info("chat answered", extra={"notebook_id": notebook_id, "timings": timings})
 
         return (
             jsonify(
@@ -144,6 +222,8 @@ def send_chat_message():
                     "reply": reply,
                     "message_id": assistant_message.id,
                     "sources": used_source_titles,  # Return only the titles of sources that were actually used
+                    "cached": False,
+                    "timings": timings,
                     "warning": (
                         "Some selected sources were deleted"
                         if source_ids and not sources
@@ -155,12 +235,38 @@ def send_chat_message():
         )
 
     except Exception as e:
+        logger.exception("Error answering chat message")
         db.session.rollback()
+        if unanswered_message_id is not None:
+            # Keep the history free of questions without a reply
+            try:
+                Chat.query.filter_by(id=unanswered_message_id).delete()
+                db.session.commit()
+            except Exception:
+                logger.exception("Error removing unanswered chat message")
+                db.session.rollback()
         return jsonify(error=str(e)), 500
 
 
 @jwt_required()
 def get_chat_messages(notebook_id):
+    """
+    Return the chat history of a notebook, oldest first.
+
+    Optional query parameters page through long histories without loading
+    every row: ``limit`` caps the page size (the newest messages by default),
+    ``before``/``after`` are message id cursors and ``since`` is an ISO
+    timestamp, so a client can fetch only messages newer than its last one.
+    """
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        before = request.args.get("before", type=int)
+        after = request.args.get("after", type=int)
+        since = request.args.get("since")
+        since = datetime.fromisoformat(since) if since else None
+    except ValueError:
+        return jsonify(error="Invalid pagination parameters"), 400
+
     try:
         # Get current user ID from JWT token
         current_user_id = get_jwt_identity()
@@ -172,17 +278,35 @@ def get_chat_messages(notebook_id):
         if not notebook:
             return jsonify(error="Notebook not found or unauthorized access"), 403
 
-        # Get all chat messages for the notebook
-        chat_messages = (
-            Chat.query.filter_by(notebook_id=notebook_id)
-            .order_by(Chat.created_at.asc())
-            .all()
-        )
+        query = Chat.query.filter_by(notebook_id=notebook_id)
+        if before is not None:
+            query = query.filter(Chat.id < before)
+        if after is not None:
+            query = query.filter(Chat.id > after)
+        if since is not None:
+            query = query.filter(Chat.created_at > since)
+
+        has_more = False
+        if limit and after is None and since is None:
+            # Newest page first, then restore chronological order
+            chat_messages = query.order_by(Chat.id.desc()).limit(limit + 1).all()
+            has_more = len(chat_messages) > limit
+            chat_messages = list(reversed(chat_messages[:limit]))
+        else:
+            query = query.order_by(Chat.id.asc())
+            if limit:
+                chat_messages = query.limit(limit + 1).all()
+                has_more = len(chat_messages) > limit
+                chat_messages = chat_messages[:limit]
+            else:
+                chat_messages = query.all()
 
         # Convert messages to dictionary format
         messages = []
         for msg in chat_messages:
             message_dict = {
+                "id": msg.id,
+                "created_at": msg.created_at.isoformat() if msg.created_at else None,
                 "role": msg.role,
                 "content": msg.message,
                 "sources": (
@@ -191,7 +315,7 @@ def get_chat_messages(notebook_id):
             }
             messages.append(message_dict)
 
-        return jsonify(messages=messages), 200
+        return conditional_json({"messages": messages, "has_more": has_more})
 
     except Exception as e:
         return jsonify(error=str(e)), 500
@@ -209,6 +333,8 @@ def delete_chat_message(notebook_id):
 
         # Delete all chat messages for the notebook
         Chat.query.filter_by(notebook_id=notebook_id).delete()
+        ChatMemory.query.filter_by(notebook_id=notebook_id).delete()
+        invalidate_notebook_answers(notebook_id)
         db.session.commit()
 
         return jsonify(message="Chat messages deleted successfully"), 200
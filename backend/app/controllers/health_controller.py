@@ -0,0 +1,27 @@
+import logging
+from flask import jsonify
+from sqlalchemy import text
+from app import db
+from app.utils.readiness import models_ready
+from app.utils.tts_provider import get_tts_health
+
+logger = logging.getLogger(__name__)
+
+
+def liveness():
+    return jsonify(status="ok"), 200
+
+
+def readiness():
+    """
+    Report ready once the models are warm and the database answers.
+    """
+    checks = {"models": models_ready(), "database": False}
+    try:
+        db.session.execute(text("SELECT 1"))
+        checks["database"] = True
+    except Exception as e:
+        logger.warning(f"Readiness database check failed: {str(e)}")
+
+    status = 200 if all(checks.values()) else 503
+    return jsonify(ready=status == 200, checks=checks, tts=get_tts_health()), status
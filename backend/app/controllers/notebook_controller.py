@@ -1,6 +1,9 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import func
 from app.models.notebook import Notebook
+from app.models.source import Source
+from app.utils.http_utils import conditional_json, parse_limit
 from app import db
 
 @jwt_required()
@@ -14,14 +17,54 @@ def create_notebook():
 
 @jwt_required()
 def get_notebooks():
+    """
+    List the user's notebooks with source counts in a single aggregated query.
+
+    Supports keyset pagination through ``limit`` and ``after`` (the last id of
+    the previous page); the next cursor is returned in ``X-Next-Cursor``.
+    """
     user_id = get_jwt_identity()
-    notebooks = Notebook.query.filter_by(user_id=user_id).all()
-    return jsonify([{
-        "id": nb.id, 
-        "name": nb.name,
-        "createdAt": nb.created_at.isoformat() if nb.created_at else None,
-        "sourceCount": len(nb.sources)
-    } for nb in notebooks]), 200
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        after = request.args.get('after', type=int)
+    except ValueError:
+        return jsonify(error="Invalid pagination parameters"), 400
+
+    query = (
+        db.session.query(
+            Notebook.id,
+            Notebook.name,
+            Notebook.created_at,
+            Notebook.updated_at,
+            func.count(Source.id).label('source_count'),
+            func.max(Source.updated_at).label('last_source_update'),
+        )
+        .outerjoin(Source, Source.notebook_id == Notebook.id)
+        .filter(Notebook.user_id == user_id)
+        .group_by(Notebook.id, Notebook.name, Notebook.created_at, Notebook.updated_at)
+        .order_by(Notebook.id.asc())
+    )
+    if after is not None:
+        query = query.filter(Notebook.id > after)
+    if limit:
+        query = query.limit(limit)
+    rows = query.all()
+
+    notebooks = []
+    for row in rows:
+        last_activity = max(filter(None, [row.updated_at, row.last_source_update]), default=None)
+        notebooks.append({
+            "id": row.id,
+            "name": row.name,
+            "createdAt": row.created_at.isoformat() if row.created_at else None,
+            "lastActivity": last_activity.isoformat() if last_activity else None,
+            "sourceCount": row.source_count
+        })
+
+    headers = {}
+    if limit and len(rows) == limit:
+        headers['X-Next-Cursor'] = str(rows[-1].id)
+    return conditional_json(notebooks, headers)
 
 @jwt_required()
 def update_notebook(notebook_id):
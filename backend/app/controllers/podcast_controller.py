@@ -1,14 +1,25 @@
-import os
+import io
+import contextvars
+import json
+import hashlib
 import tempfile
 import uuid
+import zipfile
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from flask import jsonify, request, send_file, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from app.models.notebook import Notebook
 from app.models.source import Source
 from app.models.user import User
+from app.models.podcast import PodcastScript
 from app import db
+from sqlalchemy.exc import IntegrityError
 import openai
-from app.utils.tts_provider import get_tts_provider
+from app.utils.tts_provider import STREAM_CHUNK_SIZE, get_tts_provider
+from app.utils.podcast_context import build_podcast_context
+from app.utils.metrics import outbound, record_cache
+from app.utils.profiling import track_worker
 from config import Config
 import logging
 from pydub import AudioSegment
@@ -16,6 +27,11 @@ from pydub import AudioSegment
 
 logger = logging.getLogger(__name__)
 
+# One bounded pool per process, so concurrent renders share the TTS
+# providers' pooled connections instead of opening more of them
+tts_executor = ThreadPoolExecutor(max_workers=Config.PODCAST_TTS_CONCURRENCY, thread_name_prefix="tts")
+SEGMENT_SPOOL_SIZE = 1024 * 1024  # segments larger than this spill to a temporary file
+
 @jwt_required()
 def generate_podcast(notebook_id):
     # Handle OPTIONS request separately (preflight)
@@ -53,85 +69,212 @@ def generate_podcast(notebook_id):
         logger.info(f"Description: {description}")
         logger.info(f"Mode: {podcast_mode}, Person Count: {person_count}, Has Host: {has_host}")
         
-        # Generate podcast script using OpenAI
+        # Resolve the requested sources against the user's notebook
         try:
-            script = generate_script(title, description, sources, podcast_mode, person_count, has_host)
-            logger.info("Successfully generated script")
+            sources = resolve_sources(notebook_id, user_id, sources)
+            if not sources:
+                return jsonify({"error": "Sources not found"}), 404
         except Exception as e:
-            logger.error(f"Error generating script: {str(e)}")
-            return jsonify({"error": f"Failed to generate script: {str(e)}"}), 500
+            logger.error(f"Error resolving podcast sources: {str(e)}")
+            return jsonify({"error": f"Failed to resolve sources: {str(e)}"}), 500
         
-        # Convert script to speech
-        try:
-            audio_segments = generate_audio_from_script(script)
-            if not audio_segments:
-                logger.error("Failed to generate audio - no segments returned")
-                return jsonify({"error": "Failed to generate audio"}), 500
-            logger.info(f"Successfully generated {len(audio_segments)} audio segments")
-        except Exception as e:
-            logger.error(f"Error generating audio: {str(e)}")
-            return jsonify({"error": f"Failed to generate audio: {str(e)}"}), 500
+        # Reuse a cached script for identical sources and configuration
+        token_budget = current_app.config.get('PODCAST_CONTEXT_TOKEN_BUDGET')
+        cache_key = podcast_cache_key(
+            notebook_id, sources, title, description, podcast_mode, person_count, has_host, token_budget
+        )
+        podcast_script = None if data.get('regenerate') else PodcastScript.query.filter_by(cache_key=cache_key).first()
+        cached = podcast_script is not None
+        if not data.get('regenerate'):
+            record_cache('podcast_script', cached)
         
-        # Return the audio segments and metadata
-        try:
-            # Generate a unique session ID for this request
-            session_id = str(uuid.uuid4())
-            
-            # Create a zip file containing all audio segments
-            import zipfile
-            import io
-            
-            memory_file = io.BytesIO()
-            with zipfile.ZipFile(memory_file, 'w') as zf:
-                for i, segment_path in enumerate(audio_segments):
-                    # Add each audio segment to the zip file
-                    zf.write(segment_path, f'segment_{i}.mp3')
-                    # Clean up the segment file
-                    try:
-                        os.remove(segment_path)
-                    except Exception as e:
-                        logger.error(f"Error removing segment {segment_path}: {str(e)}")
-            
-            memory_file.seek(0)
-            
-            response = send_file(
-                memory_file,
-                mimetype='application/zip',
-                as_attachment=True,
-                download_name=f'podcast_segments_{session_id}.zip'
-            )
-            
-            # Add metadata to the response headers
-            response.headers['X-Podcast-Title'] = title
-            response.headers['X-Podcast-Description'] = description
-            response.headers['X-Segment-Count'] = str(len(audio_segments))
+        if cached:
+            logger.info(f"Using cached podcast script {podcast_script.id}")
+        else:
+            # Build a token-budgeted context from the stored summaries and embeddings
+            try:
+                source_context = build_podcast_context(sources, token_budget)
+            except Exception as e:
+                logger.error(f"Error building podcast context: {str(e)}")
+                return jsonify({"error": f"Failed to build podcast context: {str(e)}"}), 500
             
-            return response
+            # Generate podcast script using OpenAI
+            try:
+                script = generate_script(title, description, source_context, podcast_mode, person_count, has_host)
+                logger.info("Successfully generated script")
+            except Exception as e:
+                logger.error(f"Error generating script: {str(e)}")
+                return jsonify({"error": f"Failed to generate script: {str(e)}"}), 500
             
-        except Exception as e:
-            logger.error(f"Error sending file: {str(e)}")
-            # Try to clean up the files if sending failed
-            for segment_path in audio_segments:
-                try:
-                    if os.path.exists(segment_path):
-                        os.remove(segment_path)
-                except:
-                    pass
-            return jsonify({"error": f"Failed to send audio file: {str(e)}"}), 500
+            try:
+                podcast_script = save_podcast_script(
+                    cache_key, notebook_id, title, description, podcast_mode, person_count, has_host, script
+                )
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error caching podcast script: {str(e)}")
+                return jsonify({"error": f"Failed to store script: {str(e)}"}), 500
+        
+        return render_script_response(podcast_script, data.get('voiceMap'), cached)
             
     except Exception as e:
         logger.error(f"Unexpected error in generate_podcast: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-def generate_script(title, description, sources, podcast_mode='normal', person_count=2, has_host=False):
-    """Generate a podcast script using OpenAI."""
+@jwt_required()
+def render_podcast(script_id):
+    """Re-render audio for a cached script without calling the LLM again."""
+    if request.method == 'OPTIONS':
+        return '', 200
+        
     try:
-        # Prepare the prompt
-        sources_text = "\n".join([
-            f"Source {i+1}: {source.get('content', source.content if hasattr(source, 'content') else str(source))}" 
-            for i, source in enumerate(sources)
-        ])
+        user_id = get_jwt_identity()
+        podcast_script = PodcastScript.query.filter_by(id=script_id).first()
+        if not podcast_script or str(podcast_script.notebook.user_id) != str(user_id):
+            return jsonify({"error": "Podcast script not found"}), 404
+        
+        data = request.get_json(silent=True) or {}
+        return render_script_response(podcast_script, data.get('voiceMap'), True)
+        
+    except Exception as e:
+        logger.error(f"Unexpected error in render_podcast: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def podcast_cache_key(notebook_id, sources, title, description, podcast_mode, person_count, has_host, token_budget=None):
+    """Hash the notebook, source contents and podcast configuration into a cache key.
+
+    Scripts belong to a notebook, so identical inline content in another
+    notebook gets its own entry.
+    """
+    source_parts = []
+    for source in sources:
+        if isinstance(source, dict):
+            source_parts.append({"content": source.get('content', ''), "title": source.get('title')})
+        else:
+            source_parts.append({
+                "id": source.id,
+                "title": source.title,
+                "description": source.description,
+                "file_id": source.file_id,
+                "updated_at": source.updated_at.isoformat() if source.updated_at else None,
+            })
+    payload = {
+        "notebook_id": str(notebook_id),
+        "sources": source_parts,
+        "title": title,
+        "description": description,
+        "podcast_mode": podcast_mode,
+        "person_count": person_count,
+        "has_host": bool(has_host),
+        "token_budget": token_budget,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def save_podcast_script(cache_key, notebook_id, title, description, podcast_mode, person_count, has_host, script):
+    """Store a generated script under its cache key, replacing a stale entry."""
+    podcast_script = PodcastScript.query.filter_by(cache_key=cache_key).first()
+    if podcast_script:
+        podcast_script.script = script
+    else:
+        podcast_script = PodcastScript(
+            notebook_id=notebook_id,
+            cache_key=cache_key,
+            title=title,
+            description=description,
+            podcast_mode=podcast_mode,
+            person_count=person_count,
+            has_host=bool(has_host),
+            script=script,
+        )
+        db.session.add(podcast_script)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent identical request stored the script first; use its row
+        db.session.rollback()
+        podcast_script = PodcastScript.query.filter_by(cache_key=cache_key).first()
+        if podcast_script is None:
+            raise
+    return podcast_script
+
+def render_script_response(podcast_script, voice_map=None, cached=False):
+    """Convert a stored script to speech and send the segments as a ZIP file."""
+    try:
+        # Generate a unique session ID for this request
+        session_id = str(uuid.uuid4())
+        
+        # Paragraphs are synthesized concurrently; each finished segment is
+        # copied into the zip in script order while later ones still stream
+        segments = generate_audio_from_script(podcast_script.script, voice_map)
+        segment_count = 0
+        memory_file = io.BytesIO()
+        try:
+            with zipfile.ZipFile(memory_file, 'w') as zf:
+                for future in segments:
+                    segment = future.result()
+                    if segment is None:
+                        continue
+                    with segment, zf.open(f'segment_{segment_count}.mp3', 'w') as entry:
+                        shutil.copyfileobj(segment, entry, STREAM_CHUNK_SIZE)
+                    segment_count += 1
+        finally:
+            # Release the spooled segments of a render that failed half way
+            for future in segments:
+                if not future.cancel() and not future.exception():
+                    segment = future.result()
+                    if segment is not None:
+                        segment.close()
+        
+        if not segment_count:
+            logger.error("Failed to generate audio - no segments returned")
+            return jsonify({"error": "Failed to generate audio"}), 500
+        logger.info(f"Successfully generated {segment_count} audio segments")
+        
+        memory_file.seek(0)
+        
+        response = send_file(
+            memory_file,
+            mimetype='application/zip',
+            as_attachment=True,
+            download_name=f'podcast_segments_{session_id}.zip'
+        )
         
+        # Add metadata to the response headers
+        response.headers['X-Podcast-Title'] = podcast_script.title or ''
+        response.headers['X-Podcast-Description'] = podcast_script.description or ''
+        response.headers['X-Segment-Count'] = str(segment_count)
+        response.headers['X-Podcast-Script-Id'] = str(podcast_script.id)
+        response.headers['X-Podcast-Script-Cached'] = 'true' if cached else 'false'
+        
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error generating audio: {str(e)}")
+        return jsonify({"error": f"Failed to generate audio: {str(e)}"}), 500
+
+def resolve_sources(notebook_id, user_id, sources):
+    """Turn the requested sources into Source rows of the user's notebook.
+
+    Source ids are looked up in the database; dicts carrying raw ``content``
+    are passed through unchanged.
+    """
+    notebook = Notebook.query.filter_by(id=notebook_id, user_id=user_id).first()
+    if not notebook:
+        return []
+
+    source_ids = [int(s) for s in sources if isinstance(s, int) or (isinstance(s, str) and s.isdigit())]
+    inline_sources = [s for s in sources if isinstance(s, dict)]
+
+    resolved = []
+    if source_ids:
+        resolved = Source.query.filter(
+            Source.id.in_(source_ids), Source.notebook_id == notebook_id
+        ).all()
+    return resolved + inline_sources
+
+def generate_script(title, description, sources_text, podcast_mode='normal', person_count=2, has_host=False):
+    """Generate a podcast script using OpenAI from a prepared source context."""
+    try:
         # Create natural names for speakers
         natural_names = {
             1: ["Alex"],
@@ -232,16 +375,17 @@ Host: That's an interesting perspective. {names[1]}, what do you think about tha
 Please create a natural conversation that covers all the key points from the sources, but in a conversational way. Make sure to include at least 10 paragraphs."""
 
         # Call OpenAI API
-        client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a professional podcast script writer specializing in natural, conversational dialogue between multiple speakers. Each speaker speaks in complete paragraphs, and the conversation flows naturally back and forth. Create scripts that are at least 10 paragraphs long."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.8,
-            max_tokens=2000
-        )
+        client = openai.OpenAI(api_key=Config.OPENAI_API_KEY, base_url=Config.OPENAI_BASE_URL)
+        with outbound("openai", "llm"):
+            response = client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "You are a professional podcast script writer specializing in natural, conversational dialogue between multiple speakers. Each speaker speaks in complete paragraphs, and the conversation flows naturally back and forth. Create scripts that are at least 10 paragraphs long."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.8,
+                max_tokens=2000
+            )
         
         script = response.choices[0].message.content
         
@@ -253,10 +397,11 @@ Please create a natural conversation that covers all the key points from the sou
     except Exception as e:
         raise Exception(f"Failed to generate script: {str(e)}")
 
-def generate_audio_from_script(script):
-    """Convert the script to audio using TTS with different voices for each speaker."""
-    tts_provider = get_tts_provider()
-    
+def split_script_paragraphs(script, voice_map=None):
+    """Split the script into (speaker, voice_id, text) paragraphs.
+
+    ``voice_map`` optionally overrides the default speaker-to-voice mapping.
+    """
     # Split the script into paragraphs by speaker
     paragraphs = []
     current_speaker = None
@@ -271,6 +416,8 @@ def generate_audio_from_script(script):
         'Megan': 'alloy',
         'Robert': 'fable'
     }
+    if voice_map:
+        name_to_voice.update(voice_map)
     
     for line in script.split('\n'):
         line = line.strip()
@@ -330,31 +477,44 @@ def generate_audio_from_script(script):
     # Log the number of paragraphs for debugging
     logger.info(f"Generated {len(paragraphs)} paragraphs")
     
-    # Generate audio for each paragraph with the appropriate voice
-    audio_segments = []
-    
-    for i, (speaker, text) in enumerate(paragraphs):
-        if not text.strip():
-            continue
-            
-        # Choose voice based on speaker
-        voice_id = name_to_voice.get(speaker, 'nova')  # Default to nova if speaker not found
-        
-        # Log for debugging
-        logger.info(f"Generating audio for paragraph {i+1}/{len(paragraphs)} with voice {voice_id} for {speaker}")
-        
-        # Generate audio for this paragraph
-        audio_path = tts_provider.text_to_speech(text, voice_id=voice_id)
-        if audio_path and os.path.exists(audio_path):
-            audio_segments.append(audio_path)
-            logger.info(f"Successfully generated audio for paragraph {i+1} at {audio_path}")
-        else:
-            logger.error(f"Failed to generate audio for paragraph {i+1}")
-    
-    if not audio_segments:
-        raise Exception("Failed to generate any audio segments")
-    
-    # Log the number of audio segments for debugging
-    logger.info(f"Generated {len(audio_segments)} audio segments")
-    
-    return audio_segments
\ No newline at end of file
+    # Choose voice based on speaker, default to nova if speaker not found
+    return [
+        (speaker, name_to_voice.get(speaker, 'nova'), text)
+        for speaker, text in paragraphs
+        if text.strip()
+    ]
+
+def _synthesize_segment(tts_provider, number, total, speaker, voice_id, text):
+    logger.info(f"Generating audio for paragraph {number}/{total} with voice {voice_id} for {speaker}")
+    segment = tempfile.SpooledTemporaryFile(max_size=SEGMENT_SPOOL_SIZE)
+    try:
+        for chunk in tts_provider.stream_speech(text, voice_id=voice_id):
+            segment.write(chunk)
+    except Exception as e:
+        segment.close()
+        logger.error(f"Failed to generate audio for paragraph {number}: {str(e)}")
+        return None
+    if not segment.tell():
+        segment.close()
+        return None
+    segment.seek(0)
+    return segment
+
+def generate_audio_from_script(script, voice_map=None):
+    """Convert the script to audio using TTS with different voices for each speaker.
+
+    Paragraphs are streamed from the TTS provider on the shared tts_executor.
+    Returns one future per paragraph in script order, resolving to a spooled
+    file with the audio, or None where synthesis failed.
+    """
+    tts_provider = get_tts_provider()
+    paragraphs = split_script_paragraphs(script, voice_map)
+    return [
+        # Run in the request's context so stage timings land in its timer
+        # and a profiled request samples the worker thread too
+        tts_executor.submit(
+            contextvars.copy_context().run, track_worker,
+            _synthesize_segment, tts_provider, i + 1, len(paragraphs), speaker, voice_id, text
+        )
+        for i, (speaker, voice_id, text) in enumerate(paragraphs)
+    ]
@@ -2,24 +2,30 @@ from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import re
 from app.models.source import Source
+from app.models.notebook import Notebook
 from app.utils.file_utils import process_input
 from app import db
 from app.utils.file_utils import (
-    extract_text_from_pdf,
-    extract_text_from_txt,
-    extract_text_from_docx,
-    extract_text_from_image,
+    extract_text_from_file,
     extract_text_from_webpage,
     extract_text_from_youtube,
+    is_youtube_link,
 )
-from app.utils.embed_and_search import generate_and_store_embeddings, EMBEDDINGS_FOLDER
+from app.utils.embed_and_search import generate_and_store_embeddings, update_embeddings, delete_embeddings
+from app.utils.answer_cache import invalidate_notebook_answers
+from app.utils.bulk_ingest import IngestLimitExceeded, collect_items, ingest_items
+from app.utils.metrics import stage
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from app.helper.ai_generate import openai_generate, generate_summary
-import traceback
-import tempfile
-import os
+import logging
+from datetime import datetime
 import pathlib
 
+logger = logging.getLogger(__name__)
+
 ALLOWED_EXTENSIONS = {"pdf", "docx", "txt", "jpg", "jpeg", "png"}
+TITLE_ALLOCATION_ATTEMPTS = 5
 
 
 def allowed_file(filename):
@@ -27,55 +33,36 @@ def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def is_youtube_link(link):
-    """Check if the link is a valid YouTube link."""
-    youtube_regex = (
-        r"(https?://)?(www\.)?"
-        "(youtube\.com|youtu\.be)/"
-        "(watch\?v=|embed/|v/|.+\?v=)?([^&=%\?]{11})"
-    )
-    return bool(re.match(youtube_regex, link))
+def allocate_unique_title(notebook_id, base_title):
+    """Return base_title or the next free "base_title N" in one query.
+
+    Concurrent requests may pick the same title; the unique
+    (notebook_id, title) index rejects the loser, which then allocates again.
+    """
+    titles = db.session.query(Source.title).filter(
+        Source.notebook_id == notebook_id,
+        or_(Source.title == base_title, Source.title.like(f"{base_title} %"))
+    ).all()
+    if not titles:
+        return base_title
+
+    suffix_pattern = re.compile(rf"^{re.escape(base_title)} (\d+)$")
+    max_suffix = 0
+    for (title,) in titles:
+        match = suffix_pattern.match(title)
+        if match:
+            max_suffix = max(max_suffix, int(match.group(1)))
+    return f"{base_title} {max_suffix + 1}"
 
 
 def generate_unique_note_title(notebook_id):
     """Generate a unique title for a new note."""
-    base_title = "New Note"
-    counter = 1
-    title = base_title
-    
-    while True:
-        existing = Source.query.filter_by(
-            notebook_id=notebook_id,
-            title=title
-        ).first()
-        
-        if not existing:
-            return title
-            
-        title = f"{base_title} {counter}"
-        counter += 1
+    return allocate_unique_title(notebook_id, "New Note")
 
 
 def generate_unique_text_title(notebook_id):
     """Generate a unique title for a new text input."""
-    base_title = "Text Note"
-    counter = 1
-    title = base_title
-    
-    while True:
-        existing = Source.query.filter_by(
-            notebook_id=notebook_id,
-            title=title
-        ).first()
-        
-        if not existing:
-            return title
-            
-        title = f"{base_title} {counter}"
-        counter += 1
-
-
-
+    return allocate_unique_title(notebook_id, "Text Note")
 
 
 @jwt_required()
@@ -102,6 +89,8 @@ def add_source():
         elif data.get('link'):
             title = data.get('link')
 
+        # Fail fast before extraction and embedding; the unique
+        # (notebook_id, title) index is what actually enforces this
         if title:
             existing_source = Source.query.filter_by(
                 notebook_id=data.get("notebook_id"),
@@ -117,52 +106,36 @@ def add_source():
             if not allowed_file(file.filename):
                 return jsonify(error="Invalid file type"), 400
 
-            # Process file directly without saving
+            # Process the upload stream directly, it only sits on disk when
+            # larger than UPLOAD_SPOOL_THRESHOLD
             file_extension = file.filename.rsplit(".", 1)[1].lower()
             try:
-                # Create a temporary file to process
-                with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as temp_file:
-                    file.save(temp_file.name)
-                    temp_path = temp_file.name
-
-                try:
-                    if file_extension == "pdf":
-                        text = extract_text_from_pdf(temp_path)
-                    elif file_extension == "txt":
-                        text = extract_text_from_txt(temp_path)
-                    elif file_extension == "docx":
-                        text = extract_text_from_docx(temp_path)
-                    elif file_extension in ["jpg", "jpeg", "png"]:
-                        text = extract_text_from_image(temp_path)
-                    else:
+                with stage("extraction"):
+                    text = extract_text_from_file(file.stream, file_extension)
+                    if text is None:
                         return jsonify(error="Unsupported file format"), 400
 
-                    if not text or text.strip() == "":
-                        return jsonify(error="No text content could be extracted from the file"), 400
-
-                    # Generate embeddings and get file_id
-                    file_id = generate_and_store_embeddings(text)
-                    print(f"File ID: {file_id}")
-                    if not file_id:
-                        return jsonify(error="Failed to generate embeddings"), 500
-
-                    # Generate summary
-                    summary = generate_summary(text)
-
-                    processed_data = {
-                        "text": text,  # Keep full text for embedding
-                        "summary": summary,  # Store summary in description
-                        "file_extension": file_extension,
-                        "title": file.filename,
-                        "file_id": file_id
-                    }
-                finally:
-                    # Clean up the temporary file
-                    os.unlink(temp_path)
-
+                if not text or text.strip() == "":
+                    return jsonify(error="No text content could be extracted from the file"), 400
+
+                # Generate embeddings and get file_id
+                file_id = generate_and_store_embeddings(text)
+                logger.debug(f"File ID: {file_id}")
+                if not file_id:
+                    return jsonify(error="Failed to generate embeddings"), 500
+
+                # Generate summary
+                summary = generate_summary(text)
+
+                processed_data = {
+                    "text": text,  # Keep full text for embedding
+                    "summary": summary,  # Store summary in description
+                    "file_extension": file_extension,
+                    "title": file.filename,
+                    "file_id": file_id
+                }
             except Exception as e:
-                print(f"Error processing file: {str(e)}")
-                print(traceback.format_exc())
+                logger.exception(f"Error processing file: {str(e)}")
                 return jsonify(error=f"Error processing file: {str(e)}"), 400
 
         elif data.get("text"):
@@ -202,15 +175,15 @@ def add_source():
                         "file_id": file_id
                     }
             except Exception as e:
-                print(f"Error processing text: {str(e)}")
-                print(traceback.format_exc())
+                logger.exception(f"Error processing text: {str(e)}")
                 return jsonify(error=f"Error processing text: {str(e)}"), 400
 
         elif data.get("link"):
             try:
                 link = data.get("link")
                 if is_youtube_link(link):
-                    text = extract_text_from_youtube(link)
+                    with stage("extraction"):
+                        text = extract_text_from_youtube(link)
                     file_id = generate_and_store_embeddings(text)
                     if not file_id:
                         return jsonify(error="Failed to generate embeddings"), 500
@@ -226,7 +199,8 @@ def add_source():
                         "file_id": file_id
                     }
                 else:
-                    text = extract_text_from_webpage(link)
+                    with stage("extraction"):
+                        text = extract_text_from_webpage(link)
                     file_id = generate_and_store_embeddings(text)
                     if not file_id:
                         return jsonify(error="Failed to generate embeddings"), 500
@@ -242,8 +216,7 @@ def add_source():
                         "file_id": file_id
                     }
             except Exception as e:
-                print(f"Error processing link: {str(e)}")
-                print(traceback.format_exc())
+                logger.exception(f"Error processing link: {str(e)}")
                 return jsonify(error=f"Error processing link: {str(e)}"), 400
         else:
             return jsonify(error="No valid input provided"), 400
@@ -251,66 +224,224 @@ def add_source():
         if not processed_data.get("text"):
             return jsonify(error="No text content could be extracted"), 400
 
+        is_note = str(data.get("is_note", "0")).lower() in ("true", "1", "yes")
+        # Generated note/text titles can race with a concurrent insert; retry with a fresh one
+        title_attempts = TITLE_ALLOCATION_ATTEMPTS if data.get("text") and not file else 1
         try:
-            source = Source(
-                notebook_id=data.get("notebook_id"),
-                file_type=processed_data["file_extension"],
-                title=processed_data["title"],
-                description=processed_data["summary"],  # Store summary instead of full text
-                is_note=str(data.get("is_note", "0")).lower() in ("true", "1", "yes"),
-                file_id=processed_data["file_id"]  or None,
-            )
-            db.session.add(source)
-            db.session.commit()
-            return jsonify(source.to_dict()), 201
+            for attempt in range(title_attempts):
+                source = Source(
+                    notebook_id=data.get("notebook_id"),
+                    file_type=processed_data["file_extension"],
+                    title=processed_data["title"],
+                    description=processed_data["summary"],  # Store summary instead of full text
+                    is_note=is_note,
+                    file_id=processed_data["file_id"]  or None,
+                )
+                try:
+                    db.session.add(source)
+                    with stage("db"):
+                        db.session.commit()
+                    return jsonify(source.to_dict()), 201
+                except IntegrityError:
+                    db.session.rollback()
+                    if attempt + 1 < title_attempts:
+                        processed_data["title"] = (
+                            generate_unique_note_title(data.get("notebook_id"))
+                            if is_note
+                            else generate_unique_text_title(data.get("notebook_id"))
+                        )
+            delete_embeddings(processed_data["file_id"])
+            return jsonify(error="A source with this title already exists"), 400
         except Exception as e:
-            print(f"Error saving to database: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception(f"Error saving to database: {str(e)}")
             db.session.rollback()
             return jsonify(error=f"Error saving to database: {str(e)}"), 500
 
     except Exception as e:
-        print(f"Unexpected error: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception(f"Unexpected error: {str(e)}")
         return jsonify(error=f"Unexpected error: {str(e)}"), 500
 
 
+def _item_status(item):
+    status = {"name": item["name"], "status": item["status"]}
+    if item.get("error"):
+        status["error"] = item["error"]
+    if item.get("source"):
+        status["source"] = item["source"]
+    return status
+
+
+@jwt_required()
+def bulk_add_sources():
+    """
+    Add many files, links or ZIP archives to a notebook in one request.
+
+    Multipart requests send ``notebook_id``, any number of ``files`` and
+    ``links`` fields; JSON requests send ``notebook_id`` and a ``links`` list.
+    All new sources are committed in one transaction and every item is
+    reported back with its own status.
+    """
+    if request.is_json:
+        data = request.get_json()
+        files = []
+        links = data.get("links", [])
+    else:
+        data = request.form
+        files = request.files.getlist("files")
+        links = request.form.getlist("links")
+
+    notebook_id = data.get("notebook_id")
+    if not notebook_id:
+        return jsonify(error="Notebook ID is required"), 400
+    notebook = Notebook.query.filter_by(id=notebook_id, user_id=get_jwt_identity()).first()
+    if not notebook:
+        return jsonify(error="Notebook not found or unauthorized access"), 403
+
+    try:
+        items = collect_items(files, links)
+    except IngestLimitExceeded as e:
+        return jsonify(error=str(e)), 400
+    except Exception as e:
+        logger.exception(f"Error reading upload: {str(e)}")
+        return jsonify(error=f"Error reading upload: {str(e)}"), 400
+    if not items:
+        return jsonify(error="No valid input provided"), 400
+
+    # Skip titles that already exist before spending time on extraction
+    names = [item["name"] for item in items if item["status"] == "pending"]
+    existing = {
+        title for (title,) in db.session.query(Source.title).filter(
+            Source.notebook_id == notebook.id, Source.title.in_(names)
+        ).all()
+    } if names else set()
+    for item in items:
+        if item["status"] != "pending":
+            continue
+        if item["name"] in existing:
+            item["status"] = "duplicate"
+            item["error"] = "A source with this title already exists"
+            item.pop("data", None)
+        existing.add(item["name"])
+
+    try:
+        ingest_items(items)
+    except Exception as e:
+        logger.exception(f"Error ingesting sources: {str(e)}")
+        return jsonify(error=f"Error ingesting sources: {str(e)}"), 500
+
+    ingested = [item for item in items if item["status"] == "pending"]
+    sources = [
+        Source(
+            notebook_id=notebook.id,
+            file_type=item["file_type"],
+            title=item["name"],
+            description=item["summary"],
+            is_note=False,
+            file_id=item["file_id"],
+        )
+        for item in ingested
+    ]
+    if sources:
+        try:
+            db.session.add_all(sources)
+            with stage("db"):
+                db.session.commit()
+        except Exception as e:
+            # One transaction: nothing was stored, so drop every new embedding
+            db.session.rollback()
+            logger.exception(f"Error saving to database: {str(e)}")
+            error = (
+                "A source with this title already exists"
+                if isinstance(e, IntegrityError)
+                else f"Error saving to database: {str(e)}"
+            )
+            for item in ingested:
+                delete_embeddings(item["file_id"])
+                item["status"] = "failed"
+                item["error"] = error
+            return jsonify(items=[_item_status(item) for item in items]), 500
+
+    for item, source in zip(ingested, sources):
+        item["status"] = "created"
+        item["source"] = source.to_dict()
+    return jsonify(items=[_item_status(item) for item in items]), 201 if sources else 400
+
+
 @jwt_required()
 def get_sources(notebook_id):
     try:
         sources = Source.query.filter_by(notebook_id=notebook_id).all()
         return jsonify([source.to_dict() for source in sources]), 200
     except Exception as e:
-        print(f"Error fetching sources: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception(f"Error fetching sources: {str(e)}")
         return jsonify(error=f"Error fetching sources: {str(e)}"), 500
 
 
 @jwt_required()
 def update_source(source_id):
+    """
+    Update a source's metadata; for notes, ``text`` replaces the note content.
+
+    New note text is re-indexed under the same file_id, embedding only the
+    chunks that changed; counts are returned in ``reindex``.
+    """
+    new_file_id = None
     try:
         data = request.get_json()
-        source = Source.query.filter_by(id=source_id).first()
+        # Only sources in the caller's own notebooks can be edited
+        source = Source.query.join(Notebook).filter(
+            Source.id == source_id, Notebook.user_id == get_jwt_identity()
+        ).first()
         if source:
-            # Check if new title already exists in the notebook
-            if data.get("title") and data.get("title") != source.title:
-                existing_source = Source.query.filter_by(
-                    notebook_id=source.notebook_id,
-                    title=data.get("title")
-                ).first()
-                if existing_source:
-                    return jsonify(error="A source with this title already exists"), 400
-
-            source.title = data.get("title", source.title)
+            title = data.get("title", source.title)
+            # Reject a duplicate title before the stored embeddings are overwritten
+            if title != source.title and Source.query.filter(
+                Source.notebook_id == source.notebook_id, Source.title == title, Source.id != source.id
+            ).first():
+                return jsonify(error="A source with this title already exists"), 400
+
+            reindex = None
+            text = data.get("text")
+            if text is not None:
+                if not source.is_note:
+                    return jsonify(error="Only the text of notes can be edited"), 400
+                if not text.strip():
+                    return jsonify(error="Note text cannot be empty"), 400
+                if source.file_id:
+                    reindex = update_embeddings(source.file_id, text)
+                    if not reindex:
+                        return jsonify(error="Failed to generate embeddings"), 500
+                else:
+                    new_file_id = generate_and_store_embeddings(text)
+                    if not new_file_id:
+                        return jsonify(error="Failed to generate embeddings"), 500
+                    source.file_id = new_file_id
+                if "description" not in data:
+                    source.description = generate_summary(text)
+                # Moves the notebook digest fingerprint even if no column changed
+                source.updated_at = datetime.utcnow()
+
+            source.title = title
             source.description = data.get("description", source.description)
             source.is_note = data.get("is_note", source.is_note)
+            invalidate_notebook_answers(source.notebook_id)
             db.session.commit()
-            return jsonify(source.to_dict()), 200
+            response = source.to_dict()
+            if reindex:
+                response["reindex"] = reindex
+            return jsonify(response), 200
         return jsonify(error="Source not found"), 404
+    except IntegrityError:
+        # A concurrent update took the title after the check above
+        db.session.rollback()
+        if new_file_id:
+            delete_embeddings(new_file_id)
+        return jsonify(error="A source with this title already exists"), 400
     except Exception as e:
-        print(f"Error updating source: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception(f"Error updating source: {str(e)}")
         db.session.rollback()
+        if new_file_id:
+            delete_embeddings(new_file_id)
         return jsonify(error=f"Error updating source: {str(e)}"), 500
 
 
@@ -324,8 +455,7 @@ def get_source(source_id):
                 return jsonify(source.to_dict()), 200
         return jsonify(error="Source not found"), 404
     except Exception as e:
-        print(f"Error fetching source: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception(f"Error fetching source: {str(e)}")
         return jsonify(error=f"Error fetching source: {str(e)}"), 500
 
 
@@ -334,35 +464,21 @@ def delete_source(source_id):
     try:
         source = Source.query.filter_by(id=source_id).first()
         if source:
-            # Delete FAISS files if they exist
+            # Delete embedding files if they exist
             if source.file_id:
                 try:
-                    # Delete chunks file
-                    chunks_file = EMBEDDINGS_FOLDER / f"{source.file_id}_chunks.npy"
-                    if chunks_file.exists():
-                        chunks_file.unlink()
-                    
-                    # Delete embeddings file
-                    embeddings_file = EMBEDDINGS_FOLDER / f"{source.file_id}_embeddings.npy"
-                    if embeddings_file.exists():
-                        embeddings_file.unlink()
-                    
-                    # Delete FAISS index file
-                    index_file = EMBEDDINGS_FOLDER / f"{source.file_id}_index.faiss"
-                    if index_file.exists():
-                        index_file.unlink()
+                    delete_embeddings(source.file_id)
                 except Exception as e:
-                    print(f"Error deleting FAISS files: {str(e)}")
-                    print(traceback.format_exc())
+                    logger.exception(f"Error deleting FAISS files: {str(e)}")
                     # Continue with source deletion even if FAISS files deletion fails
             
             # Delete the source from database
+            invalidate_notebook_answers(source.notebook_id)
             db.session.delete(source)
             db.session.commit()
             return jsonify(message="Source deleted"), 200
         return jsonify(error="Source not found"), 404
     except Exception as e:
-        print(f"Error deleting source: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception(f"Error deleting source: {str(e)}")
         db.session.rollback()
         return jsonify(error=f"Error deleting source: {str(e)}"), 500
@@ -1,12 +1,17 @@
 from openai import OpenAI
 from app import app
+from app.utils.metrics import outbound
 import requests
 import json
 
 
+def build_summary_prompt(text, token_limit=False):
+    return f"Please provide a concise summary keeping immportant keywords {'within 7500 tokens' if token_limit else ''} of the following text:\n\n{text}"
+
+
 def generate_summary(text, token_limit=False):
     """Generate a summary of the text using OpenAI."""
-    prompt = f"Please provide a concise summary keeping immportant keywords {'within 7500 tokens' if token_limit else ''} of the following text:\n\n{text}"
+    prompt = build_summary_prompt(text, token_limit)
     try:
         summary = openai_generate(prompt, False, summary=True)
         return summary
@@ -14,8 +19,8 @@ def generate_summary(text, token_limit=False):
         print(f"Error generating summary: {str(e)}")
         return text[:500] + "..."  # Fallback to first 500 characters if summary fails
 
-def openai_generate(prompt, is_regenerate=False, summary=False):
-    messages = [
+def _build_messages(prompt, summary=False):
+    return [
         {
             "role": "system",
             "content": (
@@ -26,15 +31,20 @@ def openai_generate(prompt, is_regenerate=False, summary=False):
         },
         {"role": "user", "content": prompt},
     ]
-    client = OpenAI(api_key=app.config["OPENAI_API_KEY"])
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=messages,
-        temperature=(
-            0.8 if is_regenerate else 0.7
-        ),  # Slightly higher temperature for regeneration
-        max_tokens=1000,
-    )
+
+
+def openai_generate(prompt, is_regenerate=False, summary=False):
+    messages = _build_messages(prompt, summary)
+    client = OpenAI(api_key=app.config["OPENAI_API_KEY"], base_url=app.config["OPENAI_BASE_URL"])
+    with outbound("openai", "llm"):
+        response = client.chat.completions.create(
+            model="gpt-4",
+            messages=messages,
+            temperature=(
+                0.8 if is_regenerate else 0.7
+            ),  # Slightly higher temperature for regeneration
+            max_tokens=1000,
+        )
     return response.choices[0].message.content
 
 
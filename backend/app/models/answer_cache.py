@@ -0,0 +1,33 @@
+from app import db
+from datetime import datetime
+
+class AnswerCache(db.Model):
+    __tablename__ = 'answer_cache'
+    __table_args__ = (
+        db.Index('ix_answer_cache_lookup', 'notebook_id', 'source_set_key', 'language', 'history_key'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    notebook_id = db.Column(db.Integer, db.ForeignKey('notebook.id'), nullable=False)
+    source_set_key = db.Column(db.String(64), nullable=False)  # sha256 of the sorted source ids
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of the source ids and their updated_at
+    language = db.Column(db.String(20), nullable=False, default='en')
+    history_key = db.Column(db.String(64), nullable=False, default='', server_default='')  # sha256 of the packed conversation history, '' without one
+    query = db.Column(db.Text, nullable=False)
+    query_embedding = db.Column(db.JSON, nullable=False)
+    reply = db.Column(db.Text, nullable=False)
+    sources = db.Column(db.JSON, nullable=True)  # Titles of the sources the reply used
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "notebook_id": self.notebook_id,
+            "query": self.query,
+            "reply": self.reply,
+            "sources": self.sources,
+            "hit_count": self.hit_count,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class Chat(db.Model):
     __tablename__ = 'chat'
+    __table_args__ = (
+        db.Index('ix_chat_notebook_id_created_at', 'notebook_id', 'created_at'),
+        db.Index('ix_chat_notebook_id_id', 'notebook_id', 'id'),  # keyset pages and history in id order
+    )
     id = db.Column(db.Integer, primary_key=True)
     notebook_id = db.Column(db.Integer, db.ForeignKey('notebook.id'), nullable=False)
     message = db.Column(db.Text, nullable=True)
@@ -0,0 +1,21 @@
+from app import db
+from datetime import datetime
+
+class ChatMemory(db.Model):
+    __tablename__ = 'chat_memory'
+    id = db.Column(db.Integer, primary_key=True)
+    notebook_id = db.Column(db.Integer, db.ForeignKey('notebook.id'), nullable=False, unique=True)
+    summary = db.Column(db.Text, nullable=True)  # Rolling summary of older chat turns
+    summarized_upto_id = db.Column(db.Integer, nullable=False, default=0)  # Last Chat.id folded into the summary
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "notebook_id": self.notebook_id,
+            "summary": self.summary,
+            "summarized_upto_id": self.summarized_upto_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
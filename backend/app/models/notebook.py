@@ -4,7 +4,7 @@ from datetime import datetime
 class Notebook(db.Model):
     __tablename__ = 'notebook'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -12,6 +12,10 @@ class Notebook(db.Model):
     # Define relationship with sources with cascade delete
     sources = db.relationship('Source', backref='notebook', cascade='all, delete-orphan')
     chats = db.relationship('Chat', backref='notebook', cascade='all, delete-orphan')
+    podcast_scripts = db.relationship('PodcastScript', backref='notebook', cascade='all, delete-orphan')
+    answer_cache = db.relationship('AnswerCache', backref='notebook', cascade='all, delete-orphan')
+    digests = db.relationship('NotebookDigest', backref='notebook', cascade='all, delete-orphan')
+    chat_memory = db.relationship('ChatMemory', backref='notebook', uselist=False, cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -0,0 +1,24 @@
+from app import db
+from datetime import datetime
+
+class NotebookDigest(db.Model):
+    __tablename__ = 'notebook_digest'
+    __table_args__ = (
+        db.UniqueConstraint('notebook_id', 'source_set_key', name='uq_notebook_digest_source_set'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    notebook_id = db.Column(db.Integer, db.ForeignKey('notebook.id'), nullable=False)
+    source_set_key = db.Column(db.String(64), nullable=False)  # sha256 of the sorted source ids
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of the source ids and their updated_at
+    digest = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "notebook_id": self.notebook_id,
+            "digest": self.digest,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,30 @@
+from app import db
+from datetime import datetime
+
+class PodcastScript(db.Model):
+    __tablename__ = 'podcast_script'
+    id = db.Column(db.Integer, primary_key=True)
+    notebook_id = db.Column(db.Integer, db.ForeignKey('notebook.id'), nullable=False, index=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False)  # sha256 of source contents + configuration
+    title = db.Column(db.String(200), nullable=True)
+    description = db.Column(db.Text, nullable=True)
+    podcast_mode = db.Column(db.String(20), nullable=False, default='normal')
+    person_count = db.Column(db.Integer, nullable=False, default=2)
+    has_host = db.Column(db.Boolean, default=False)
+    script = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "notebook_id": self.notebook_id,
+            "title": self.title,
+            "description": self.description,
+            "podcast_mode": self.podcast_mode,
+            "person_count": self.person_count,
+            "has_host": self.has_host,
+            "script": self.script,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class Source(db.Model):
     __tablename__ = 'source'
+    __table_args__ = (
+        db.Index('ix_source_notebook_id_created_at', 'notebook_id', 'created_at'),
+        db.Index('ux_source_notebook_id_title', 'notebook_id', 'title', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     notebook_id = db.Column(db.Integer, db.ForeignKey('notebook.id'), nullable=False)
     file_type = db.Column(db.String(50), nullable=False)  # e.g., 'text', 'image', 'audio', 'video'
@@ -8,7 +8,7 @@ class User(db.Model):
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)
-    reset_token = db.Column(db.String(200), nullable=True)
+    reset_token = db.Column(db.String(200), nullable=True, index=True)
     platform = db.Column(db.String(100), nullable=True)
     oauth_id = db.Column(db.String(100), nullable=True)
     # add column role, for the first user role will be admin automatically and for other user it will be user
@@ -0,0 +1,87 @@
+import hashlib
+from typing import List, Optional
+
+import numpy as np
+
+from app import app, db
+from app.models.answer_cache import AnswerCache
+from app.utils.notebook_digest import source_set_key, source_set_fingerprint
+from app.utils.metrics import record_cache
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.95
+DEFAULT_MAX_CANDIDATES = 200
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(b, axis=1) * np.linalg.norm(a)
+    norms[norms == 0] = 1e-12
+    return (b @ a) / norms
+
+
+def history_key(history: str) -> str:
+    """Key of the conversation a question was asked in; '' for a standalone question."""
+    return hashlib.sha256(history.encode("utf-8")).hexdigest() if history else ""
+
+
+def lookup_answer(notebook_id, sources: List, language: str, history: str,
+                  query_embedding: np.ndarray) -> Optional[AnswerCache]:
+    """Return a cached answer whose query is within the cosine threshold.
+
+    Only answers given after the same packed conversation history match, so a
+    follow-up question never reuses a reply written for another conversation.
+    Entries written before any of the selected sources changed no longer match
+    the current fingerprint and are dropped on the way.
+    """
+    threshold = app.config.get("ANSWER_CACHE_THRESHOLD", DEFAULT_SIMILARITY_THRESHOLD)
+    key = source_set_key(sources)
+    fingerprint = source_set_fingerprint(sources)
+
+    candidates = (
+        AnswerCache.query.filter_by(
+            notebook_id=notebook_id, source_set_key=key, language=language, history_key=history_key(history)
+        )
+        .order_by(AnswerCache.id.desc())
+        .limit(DEFAULT_MAX_CANDIDATES)
+        .all()
+    )
+    stale = [entry for entry in candidates if entry.fingerprint != fingerprint]
+    for entry in stale:
+        db.session.delete(entry)
+    fresh = [entry for entry in candidates if entry.fingerprint == fingerprint]
+    if not fresh:
+        record_cache("answer", False)
+        return None
+
+    embeddings = np.array([entry.query_embedding for entry in fresh], dtype=np.float32)
+    similarities = _cosine(np.asarray(query_embedding, dtype=np.float32), embeddings)
+    best = int(np.argmax(similarities))
+    if similarities[best] < threshold:
+        record_cache("answer", False)
+        return None
+
+    record_cache("answer", True)
+    entry = fresh[best]
+    entry.hit_count += 1
+    return entry
+
+
+def store_answer(notebook_id, sources: List, language: str, history: str, query: str,
+                 query_embedding: np.ndarray, reply: str, used_sources: List[str]) -> None:
+    """Remember a generated reply; committed together with the chat messages."""
+    db.session.add(AnswerCache(
+        notebook_id=notebook_id,
+        source_set_key=source_set_key(sources),
+        fingerprint=source_set_fingerprint(sources),
+        language=language,
+        history_key=history_key(history),
+        query=query,
+        query_embedding=[float(x) for x in query_embedding],
+        reply=reply,
+        sources=used_sources,
+        hit_count=0,
+    ))
+
+
+def invalidate_notebook_answers(notebook_id) -> None:
+    """Drop every cached answer of a notebook, e.g. after one of its sources changed."""
+    AnswerCache.query.filter_by(notebook_id=notebook_id).delete()
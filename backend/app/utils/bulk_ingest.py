@@ -0,0 +1,177 @@
+import contextvars
+import logging
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from app.helper.ai_generate import generate_summary
+from app.utils.embed_and_search import generate_and_store_embeddings_batch
+from app.utils.file_utils import (
+    FILE_EXTRACTORS,
+    extract_text_from_file,
+    extract_text_from_webpage,
+    extract_text_from_youtube,
+    is_extraction_error,
+    is_youtube_link,
+)
+from app.utils.metrics import stage
+from app.utils.profiling import track_worker
+from app.utils.web_fetch import fetch_executor
+
+logger = logging.getLogger(__name__)
+
+# Extraction and summaries are I/O or GIL-releasing work, embeddings run batched afterwards
+ingest_executor = ThreadPoolExecutor(max_workers=Config.BULK_INGEST_WORKERS, thread_name_prefix="ingest")
+
+
+def _submit(func, *args, executor=ingest_executor):
+    # Run in the request's context so stage timings land in its timer
+    # and a profiled request samples the worker thread too
+    return executor.submit(contextvars.copy_context().run, track_worker, func, *args)
+
+
+class IngestLimitExceeded(Exception):
+    """The request holds more items or bytes than one bulk ingest accepts."""
+
+
+def _reserve(budget, size=0):
+    """Count one more item of size bytes against the request's limits."""
+    budget["items"] += 1
+    budget["bytes"] += size
+    if budget["items"] > Config.BULK_INGEST_MAX_ITEMS:
+        raise IngestLimitExceeded(f"At most {Config.BULK_INGEST_MAX_ITEMS} items can be added at once")
+    if budget["bytes"] > Config.BULK_INGEST_MAX_TOTAL_BYTES:
+        raise IngestLimitExceeded(
+            f"At most {Config.BULK_INGEST_MAX_TOTAL_BYTES // (1024 * 1024)} MB can be added at once"
+        )
+
+
+def _extension(filename):
+    return filename.rsplit(".", 1)[1].lower() if "." in filename else ""
+
+
+def _file_item(name, data):
+    extension = _extension(name)
+    if extension not in FILE_EXTRACTORS:
+        return {"name": name, "status": "failed", "error": "Invalid file type"}
+    if len(data) > Config.BULK_INGEST_MAX_FILE_BYTES:
+        return {"name": name, "status": "failed", "error": "File too large"}
+    return {"name": name, "status": "pending", "kind": "file", "extension": extension, "data": data}
+
+
+def _read_file(file):
+    # Read one byte past the limit, enough to tell an oversized file apart
+    return file.read(Config.BULK_INGEST_MAX_FILE_BYTES + 1)
+
+
+def _zip_items(name, stream, budget):
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile:
+        _reserve(budget)
+        return [{"name": name, "status": "failed", "error": "Invalid ZIP archive"}]
+    items = []
+    with archive:
+        for info in archive.infolist():
+            member = os.path.basename(info.filename)
+            if info.is_dir() or not member or info.filename.startswith("__MACOSX/"):
+                continue
+            # Check the declared size before inflating anything; reading
+            # stops at the declared size, so it also bounds the inflated data
+            if info.file_size > Config.BULK_INGEST_MAX_FILE_BYTES:
+                _reserve(budget)
+                items.append({"name": member, "status": "failed", "error": "File too large"})
+            elif _extension(member) not in FILE_EXTRACTORS:
+                _reserve(budget)
+                items.append({"name": member, "status": "failed", "error": "Invalid file type"})
+            else:
+                _reserve(budget, info.file_size)
+                items.append(_file_item(member, archive.read(info)))
+    return items
+
+
+def collect_items(files, links):
+    """Turn uploaded files, ZIP archives and links into ingestion items.
+
+    The item count and the total bytes read are checked as items are
+    collected, so an oversized request fails before it is held in memory.
+    Raises IngestLimitExceeded when BULK_INGEST_MAX_ITEMS or
+    BULK_INGEST_MAX_TOTAL_BYTES is exceeded.
+    """
+    budget = {"items": 0, "bytes": 0}
+    items = []
+    for file in files:
+        if _extension(file.filename) == "zip":
+            items.extend(_zip_items(file.filename, file.stream, budget))
+        else:
+            data = _read_file(file)
+            _reserve(budget, len(data))
+            items.append(_file_item(file.filename, data))
+    for link in links:
+        link = link.strip()
+        if link:
+            _reserve(budget)
+            items.append({"name": link, "status": "pending", "kind": "link", "link": link})
+    return items
+
+
+def _extract(item):
+    with stage("extraction"):
+        if item["kind"] == "link":
+            if is_youtube_link(item["link"]):
+                return extract_text_from_youtube(item["link"]), "youtube"
+            return extract_text_from_webpage(item["link"]), "url"
+        return extract_text_from_file(item["data"], item["extension"]), item["extension"]
+
+
+def _fail(item, error):
+    item["status"] = "failed"
+    item["error"] = error
+
+
+def ingest_items(items):
+    """Extract, embed and summarize the pending items in place.
+
+    Extraction fans out over the worker pool, links over the shared fetch pool
+    so WEB_FETCH_CONCURRENCY bounds them across requests; the chunks of every
+    document are embedded together in shared batches, then summaries fan out
+    again.
+    Successful items end with ``text``, ``summary``, ``file_type`` and ``file_id``.
+    """
+    pending = [item for item in items if item["status"] == "pending"]
+
+    futures = [
+        (item, _submit(_extract, item, executor=fetch_executor if item["kind"] == "link" else ingest_executor))
+        for item in pending
+    ]
+    for item, future in futures:
+        item.pop("data", None)
+        try:
+            text, file_type = future.result()
+        except Exception as e:
+            logger.exception(f"Error extracting {item['name']}: {str(e)}")
+            _fail(item, f"Error processing {item['kind']}: {str(e)}")
+            continue
+        if not text or not text.strip():
+            _fail(item, "No text content could be extracted")
+            continue
+        if is_extraction_error(text):
+            _fail(item, text)
+            continue
+        item["text"] = text
+        item["file_type"] = file_type
+
+    extracted = [item for item in pending if item["status"] == "pending"]
+    file_ids = generate_and_store_embeddings_batch([item["text"] for item in extracted])
+    for item, file_id in zip(extracted, file_ids):
+        if file_id:
+            item["file_id"] = file_id
+        else:
+            _fail(item, "Failed to generate embeddings")
+
+    embedded = [item for item in extracted if item["status"] == "pending"]
+    futures = [(item, _submit(generate_summary, item["text"])) for item in embedded]
+    for item, future in futures:
+        item["summary"] = future.result()
+    return items
@@ -0,0 +1,91 @@
+from typing import Dict, List, Tuple
+
+from app.utils.embed_and_search import encoding, OVERLAP
+
+DEFAULT_TOKEN_BUDGET = 3000
+MIN_OVERLAP_CHARS = 20
+MAX_OVERLAP_CHARS = OVERLAP * 8  # Generous upper bound on the characters in OVERLAP tokens
+MIN_PARTIAL_TOKENS = 100  # Smallest truncated span worth adding when the budget is nearly full
+
+
+def count_tokens(text: str) -> int:
+    return len(encoding.encode(text)) if text else 0
+
+
+def merge_overlapping(first: str, second: str) -> str:
+    """Join two neighbouring chunks, dropping the overlap window they share."""
+    limit = min(len(first), len(second), MAX_OVERLAP_CHARS)
+    for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+        if second.startswith(first[-size:]):
+            return first + second[size:]
+    return f"{first}\n\n{second}"
+
+
+def _build_spans(search_results: List[Dict]) -> List[Dict]:
+    """Group results into runs of adjacent chunks per file, merged into one text."""
+    by_file = {}
+    for result in search_results:
+        chunks = by_file.setdefault(result["file_id"], {})
+        index = result.get("chunk_index")
+        if index is None:
+            # Without a position only exact duplicates can be detected
+            index = ("text", result["chunk"])
+        if index not in chunks or chunks[index]["score"] < result["score"]:
+            chunks[index] = result
+
+    spans = []
+    seen_text = set()
+    for file_id, chunks in by_file.items():
+        positioned = sorted(k for k in chunks if isinstance(k, int))
+        runs = []
+        for index in positioned:
+            if runs and index == runs[-1][-1] + 1:
+                runs[-1].append(index)
+            else:
+                runs.append([index])
+        runs.extend([key] for key in chunks if not isinstance(key, int))
+
+        for run in runs:
+            text = chunks[run[0]]["chunk"]
+            for index in run[1:]:
+                text = merge_overlapping(text, chunks[index]["chunk"])
+            if text in seen_text:
+                continue
+            seen_text.add(text)
+            spans.append({
+                "file_id": file_id,
+                "text": text,
+                "score": max(chunks[index]["score"] for index in run),
+            })
+    spans.sort(key=lambda span: span["score"], reverse=True)
+    return spans
+
+
+def pack_context(search_results: List[Dict], file_id_to_title: Dict[str, str],
+                 token_budget: int = DEFAULT_TOKEN_BUDGET) -> Tuple[str, List[str]]:
+    """Build the chat context from search results within a token budget.
+
+    Overlapping neighbour chunks are merged, duplicates dropped, and spans are
+    added in score order until the budget is used. Returns the context and the
+    file ids that made it in.
+    """
+    parts = []
+    used_file_ids = []
+    used = 0
+    for span in _build_spans(search_results):
+        header = f"Relevant content from {file_id_to_title.get(span['file_id'], 'Unknown')}:\n"
+        header_cost = count_tokens(header)
+        text_cost = count_tokens(span["text"])
+        remaining = token_budget - used - header_cost
+        if text_cost > remaining:
+            if remaining < MIN_PARTIAL_TOKENS:
+                continue
+            text = encoding.decode(encoding.encode(span["text"])[:remaining])
+            text_cost = remaining
+        else:
+            text = span["text"]
+        parts.append(header + text)
+        used += header_cost + text_cost
+        if span["file_id"] not in used_file_ids:
+            used_file_ids.append(span["file_id"])
+    return "\n\n".join(parts), used_file_ids
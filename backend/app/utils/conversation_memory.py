@@ -0,0 +1,139 @@
+import logging
+from typing import List
+
+from sqlalchemy.exc import IntegrityError
+
+from app import app, db
+from app.models.chat import Chat
+from app.models.chat_memory import ChatMemory
+from app.helper.ai_generate import openai_generate
+from app.utils.embed_and_search import encoding
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = 1500
+DEFAULT_MAX_MESSAGES = 10
+SUMMARY_SHARE = 0.3  # Part of the budget the rolling summary may take
+FOLD_THRESHOLD = 0.5  # Fold once the turns past the window reach this share of it
+FOLD_BATCH_TOKENS = 3000  # Transcript tokens per summarization call
+MAX_FOLD_BATCHES = 2  # Summarization calls per chat turn; a long backlog folds over several turns
+
+
+def count_tokens(text: str) -> int:
+    return len(encoding.encode(text)) if text else 0
+
+
+def _format_message(message: Chat) -> str:
+    speaker = "User" if message.role == "user" else "Assistant"
+    return f"{speaker}: {message.message or ''}"
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[-max_tokens:])
+
+
+def _fold_batches(messages: List[Chat]) -> List[List[Chat]]:
+    batches = [[]]
+    used = 0
+    for message in messages:
+        cost = min(count_tokens(_format_message(message)), FOLD_BATCH_TOKENS)
+        if batches[-1] and used + cost > FOLD_BATCH_TOKENS:
+            batches.append([])
+            used = 0
+        batches[-1].append(message)
+        used += cost
+    return batches
+
+
+def _fold_into_summary(memory: ChatMemory, messages: List[Chat]) -> None:
+    """Summarize older turns into the stored rolling summary.
+
+    Turns go to the LLM in token-bounded batches, at most MAX_FOLD_BATCHES per
+    call. The cursor only moves past a batch once its summary came back, so a
+    failed call leaves those turns to be folded on a later turn.
+    """
+    for batch in _fold_batches(messages)[:MAX_FOLD_BATCHES]:
+        transcript = _truncate("\n".join(_format_message(m) for m in batch), FOLD_BATCH_TOKENS)
+        text = (
+            f"Summary of the conversation so far:\n{memory.summary}\n\nNew turns:\n{transcript}"
+            if memory.summary
+            else transcript
+        )
+        prompt = f"Please provide a concise summary keeping important keywords of the following conversation:\n\n{text}"
+        try:
+            summary = openai_generate(prompt, False, summary=True)
+        except Exception as e:
+            logger.error(f"Error folding chat history of notebook {memory.notebook_id}: {str(e)}")
+            return
+        if not summary:
+            return
+        memory.summary = summary
+        memory.summarized_upto_id = batch[-1].id
+        db.session.commit()
+
+
+def _get_or_create_memory(notebook_id) -> ChatMemory:
+    memory = ChatMemory.query.filter_by(notebook_id=notebook_id).first()
+    if memory is not None:
+        return memory
+    db.session.add(ChatMemory(notebook_id=notebook_id, summarized_upto_id=0))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent chat turn created the row first; use that one
+        db.session.rollback()
+    return ChatMemory.query.filter_by(notebook_id=notebook_id).first()
+
+
+def build_conversation_history(notebook_id, token_budget=None, max_messages=None) -> str:
+    """Pack the rolling summary and the most recent turns into a token budget.
+
+    Turns that no longer fit are folded into the stored summary once and never
+    re-read, so each chat turn costs a bounded number of prompt tokens. Folding
+    waits until the overflow reaches half the window, so most turns make no
+    summarization call at all.
+
+    The notebook's memory row is created and committed on first use, so the
+    session must not hold other pending changes.
+    """
+    token_budget = token_budget or app.config.get("CHAT_HISTORY_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET)
+    max_messages = max_messages or app.config.get("CHAT_HISTORY_MAX_MESSAGES", DEFAULT_MAX_MESSAGES)
+    summary_budget = int(token_budget * SUMMARY_SHARE)
+    recent_budget = token_budget - summary_budget
+
+    memory = _get_or_create_memory(notebook_id)
+
+    pending = (
+        Chat.query.filter(Chat.notebook_id == notebook_id, Chat.id > memory.summarized_upto_id)
+        .order_by(Chat.id.asc())
+        .all()
+    )
+
+    # Keep the newest turns that fit; everything older is summarized
+    recent = []
+    used = 0
+    for message in reversed(pending):
+        cost = count_tokens(_format_message(message))
+        if len(recent) >= max_messages or (recent and used + cost > recent_budget):
+            break
+        recent.insert(0, message)
+        used += cost
+
+    overflow = pending[: len(pending) - len(recent)]
+    overflow_tokens = sum(count_tokens(_format_message(m)) for m in overflow)
+    if overflow and (
+        len(overflow) >= max(int(max_messages * FOLD_THRESHOLD), 1)
+        or overflow_tokens >= recent_budget * FOLD_THRESHOLD
+    ):
+        _fold_into_summary(memory, overflow)
+
+    parts = []
+    if memory.summary:
+        parts.append(f"Summary of earlier conversation:\n{_truncate(memory.summary, summary_budget)}")
+    if recent:
+        lines = [_format_message(m) for m in recent]
+        parts.append("Recent conversation:\n" + _truncate("\n".join(lines), recent_budget))
+    return "\n\n".join(parts)
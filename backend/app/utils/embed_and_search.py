@@ -8,12 +8,17 @@ import uuid
 from app import app, db
 from pathlib import Path
 from typing import List, Dict, Optional
-from tqdm import tqdm
 import tiktoken
 import json
+import hashlib
+from collections import defaultdict, deque
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import re
+import logging
+from app.utils.metrics import stage
+
+logger = logging.getLogger(__name__)
 
 # Load OpenAI API key from .env file
 openai.api_key = api_key=app.config["OPENAI_API_KEY"]
@@ -58,10 +63,21 @@ def split_into_chunks(text: str, max_tokens: int = MAX_TOKENS, overlap: int = OV
 def create_embedding(text: str) -> Optional[np.ndarray]:
     try:
         # Use sentence-transformers instead of OpenAI for embeddings
-        embedding = model.encode(text, convert_to_numpy=True)
+        with stage("embedding"):
+            embedding = model.encode(text, convert_to_numpy=True)
         return embedding.astype(np.float32)
     except Exception as e:
-        print(f"Error generating embedding: {e}")
+        logger.error(f"Error generating embedding: {e}")
+        return None
+
+def create_embeddings(texts: List[str]) -> Optional[np.ndarray]:
+    """Embed several texts in one model call, one row per text."""
+    try:
+        with stage("embedding"):
+            embeddings = model.encode(texts, batch_size=EMBEDDING_BATCH_SIZE, convert_to_numpy=True)
+        return embeddings.astype(np.float32)
+    except Exception as e:
+        logger.error(f"Error generating embeddings: {e}")
         return None
 
 def calculate_relevance_score(chunk: str, query: str, base_score: float) -> float:
@@ -94,55 +110,146 @@ def calculate_relevance_score(chunk: str, query: str, base_score: float) -> floa
     # Combine scores with weights
     final_score = (0.4 * base_score) + (0.3 * word_match_ratio) + phrase_bonus + semantic_bonus
     
-    # Debug output
-    print(f"Debug - Chunk: {chunk[:100]}...")
-    print(f"Debug - Score components: base={base_score:.3f}, word_match={word_match_ratio:.3f}, phrase_bonus={phrase_bonus}, semantic_bonus={semantic_bonus}")
-    print(f"Debug - Final score: {final_score:.3f}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("relevance score", extra={
+            "chunk": chunk[:100],
+            "base": round(base_score, 3),
+            "word_match": round(word_match_ratio, 3),
+            "phrase_bonus": phrase_bonus,
+            "semantic_bonus": semantic_bonus,
+            "final": round(final_score, 3),
+        })
     
     return final_score
 
-def generate_and_store_embeddings(text: str) -> Optional[str]:
-    file_id = str(uuid.uuid4())
-    chunks = split_into_chunks(text)
-    
-    if not chunks:
-        print("No valid chunks created from input text")
-        return None
-    
-    print(f"Debug - Generated {len(chunks)} chunks")
-    
-    # Generate embeddings for all chunks
-    embeddings = []
-    for chunk in tqdm(chunks, desc="Generating embeddings"):
-        embedding = create_embedding(chunk)
-        if embedding is not None:
-            embeddings.append(embedding)
-    
-    if not embeddings:
-        print("No embeddings generated for the text")
-        return None
-    
+EMBEDDING_BATCH_SIZE = 64
+
+def _store_embeddings(file_id: str, chunks: List[str], embeddings_np: np.ndarray) -> Optional[str]:
+    embeddings_file = EMBEDDINGS_FOLDER / f"{file_id}_embeddings.npy"
+    chunks_file = EMBEDDINGS_FOLDER / f"{file_id}_chunks.json"
+    # Write both files aside and swap them in, so a concurrent search of a
+    # re-indexed file never reads a half written one
+    embeddings_tmp = EMBEDDINGS_FOLDER / f"{file_id}_embeddings.{uuid.uuid4().hex}.tmp"
+    chunks_tmp = EMBEDDINGS_FOLDER / f"{file_id}_chunks.{uuid.uuid4().hex}.tmp"
     try:
-        # Convert embeddings to numpy array
-        embeddings_np = np.array(embeddings, dtype=np.float32)
-        
         # Save embeddings and chunks
-        embeddings_file = EMBEDDINGS_FOLDER / f"{file_id}_embeddings.npy"
-        np.save(embeddings_file, embeddings_np)
+        with open(embeddings_tmp, 'wb') as f:
+            np.save(f, embeddings_np)
         
         # Save chunks and metadata
-        chunks_file = EMBEDDINGS_FOLDER / f"{file_id}_chunks.json"
-        with open(chunks_file, 'w', encoding='utf-8') as f:
+        with open(chunks_tmp, 'w', encoding='utf-8') as f:
             json.dump({
                 'chunks': chunks,
                 'file_id': file_id
             }, f, ensure_ascii=False)
         
-        print(f"Debug - Saved embeddings and chunks for file_id: {file_id}")
+        os.replace(embeddings_tmp, embeddings_file)
+        os.replace(chunks_tmp, chunks_file)
+        logger.debug(f"Saved embeddings and chunks for file_id: {file_id}")
         return file_id
     except Exception as e:
-        print(f"Error storing embeddings: {e}")
+        logger.error(f"Error storing embeddings: {e}")
+        for path in (embeddings_tmp, chunks_tmp):
+            if path.exists():
+                path.unlink()
+        return None
+
+def generate_and_store_embeddings_batch(texts: List[str]) -> List[Optional[str]]:
+    """Embed and store several documents, returning one file_id (or None) per text.
+
+    The chunks of all documents go through the model in shared batches, which
+    is much faster than encoding document by document.
+    """
+    with stage("chunking"):
+        chunked = [split_into_chunks(text) if text else [] for text in texts]
+    all_chunks = [chunk for chunks in chunked for chunk in chunks]
+    if not all_chunks:
+        logger.warning("No valid chunks created from input text")
+        return [None] * len(texts)
+    
+    logger.debug(f"Generated {len(all_chunks)} chunks for {len(texts)} documents")
+    
+    try:
+        with stage("embedding"):
+            embeddings = model.encode(
+                all_chunks, batch_size=EMBEDDING_BATCH_SIZE, convert_to_numpy=True
+            ).astype(np.float32)
+    except Exception as e:
+        logger.error(f"Error generating embeddings: {e}")
+        return [None] * len(texts)
+    
+    file_ids = []
+    offset = 0
+    for chunks in chunked:
+        if not chunks:
+            logger.warning("No valid chunks created from input text")
+            file_ids.append(None)
+            continue
+        file_ids.append(_store_embeddings(str(uuid.uuid4()), chunks, embeddings[offset:offset + len(chunks)]))
+        offset += len(chunks)
+    return file_ids
+
+def generate_and_store_embeddings(text: str) -> Optional[str]:
+    return generate_and_store_embeddings_batch([text])[0]
+
+def _chunk_hash(chunk: str) -> str:
+    return hashlib.sha256(chunk.encode('utf-8')).hexdigest()
+
+def update_embeddings(file_id: str, text: str) -> Optional[Dict]:
+    """Re-index edited text under the same file_id, embedding only changed chunks.
+
+    The new chunks are matched to the stored ones by content hash; matching
+    chunks keep their stored vectors and only the rest go through the model.
+    Returns counts of reused, embedded and removed chunks, or None on failure.
+    """
+    with stage("chunking"):
+        chunks = split_into_chunks(text)
+    if not chunks:
+        logger.warning("No valid chunks created from input text")
+        return None
+
+    old_embeddings, old_chunks = None, None
+    if (EMBEDDINGS_FOLDER / f"{file_id}_embeddings.npy").exists():
+        old_embeddings, old_chunks = load_embeddings_and_chunks(file_id)
+    available = defaultdict(deque)
+    if old_embeddings is not None and old_chunks is not None and len(old_chunks) == len(old_embeddings):
+        for index, chunk in enumerate(old_chunks):
+            available[_chunk_hash(chunk)].append(index)
+
+    reused = {}
+    changed = []
+    for position, chunk in enumerate(chunks):
+        indices = available.get(_chunk_hash(chunk))
+        if indices:
+            reused[position] = indices.popleft()
+        else:
+            changed.append(position)
+
+    dimension = model.get_sentence_embedding_dimension()
+    embeddings = np.empty((len(chunks), dimension), dtype=np.float32)
+    for position, index in reused.items():
+        embeddings[position] = old_embeddings[index]
+    if changed:
+        try:
+            with stage("embedding"):
+                embeddings[changed] = model.encode(
+                    [chunks[position] for position in changed],
+                    batch_size=EMBEDDING_BATCH_SIZE, convert_to_numpy=True
+                ).astype(np.float32)
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {e}")
+            return None
+
+    if not _store_embeddings(file_id, chunks, embeddings):
         return None
+    stats = {
+        "chunks": len(chunks),
+        "reused": len(reused),
+        "embedded": len(changed),
+        "removed": (len(old_chunks) if old_chunks else 0) - len(reused),
+    }
+    logger.debug(f"Re-indexed {file_id}", extra=stats)
+    return stats
 
 def load_embeddings_and_chunks(file_id: str) -> tuple[Optional[np.ndarray], Optional[List[str]]]:
     try:
@@ -156,57 +263,99 @@ def load_embeddings_and_chunks(file_id: str) -> tuple[Optional[np.ndarray], Opti
             data = json.load(f)
             chunks = data['chunks']
         
-        print(f"Debug - Loaded {len(chunks)} chunks for file_id: {file_id}")
+        logger.debug(f"Loaded {len(chunks)} chunks for file_id: {file_id}")
         return embeddings, chunks
     except Exception as e:
-        print(f"Error loading embeddings and chunks for {file_id}: {e}")
+        logger.error(f"Error loading embeddings and chunks for {file_id}: {e}")
         return None, None
 
-def search_across_indices(query: str, file_ids: List[str], top_k: int = 5) -> List[Dict]:
+def delete_embeddings(file_id: str) -> None:
+    """Remove the stored embeddings, chunks and any legacy FAISS index for a file."""
+    for suffix in ("_embeddings.npy", "_chunks.json", "_chunks.npy", "_index.faiss"):
+        path = EMBEDDINGS_FOLDER / f"{file_id}{suffix}"
+        if path.exists():
+            path.unlink()
+
+def search_across_indices(query: str, file_ids: List[str], top_k: int = 5,
+                          query_embedding: Optional[np.ndarray] = None) -> List[Dict]:
     try:
-        print(f"Debug - Searching for query: {query}")
-        print(f"Debug - Searching across {len(file_ids)} files")
+        logger.debug("searching", extra={"query": query, "files": len(file_ids)})
         
-        # Create query embedding
-        query_embedding = create_embedding(query)
+        # Create query embedding unless the caller already has one
+        if query_embedding is None:
+            query_embedding = create_embedding(query)
         if query_embedding is None:
             return []
         
-        all_results = []
+        with stage("retrieval"):
+            all_results = []
         
-        # Search in each file's embeddings
-        for file_id in file_ids:
-            embeddings, chunks = load_embeddings_and_chunks(file_id)
-            if embeddings is None or chunks is None:
-                continue
+            # Search in each file's embeddings
+            for file_id in file_ids:
+                embeddings, chunks = load_embeddings_and_chunks(file_id)
+                if embeddings is None or chunks is None:
+                    continue
             
-            # Calculate cosine similarities
-            similarities = cosine_similarity([query_embedding], embeddings)[0]
+                # Calculate cosine similarities
+                similarities = cosine_similarity([query_embedding], embeddings)[0]
             
-            # Get top k results
-            top_indices = np.argsort(similarities)[-top_k:][::-1]
+                # Get top k results
+                top_indices = np.argsort(similarities)[-top_k:][::-1]
             
-            for idx in top_indices:
-                base_score = float(similarities[idx])
+                for idx in top_indices:
+                    base_score = float(similarities[idx])
                 
-                # Calculate more sophisticated relevance score
-                relevance_score = calculate_relevance_score(chunks[idx], query, base_score)
+                    # Calculate more sophisticated relevance score
+                    relevance_score = calculate_relevance_score(chunks[idx], query, base_score)
                 
+                    if relevance_score >= MIN_SCORE_THRESHOLD:
+                        all_results.append({
+                            "file_id": file_id,
+                            "chunk": chunks[idx],
+                            "chunk_index": int(idx),
+                            "distance": 1 - base_score,  # Convert similarity to distance
+                            "score": relevance_score
+                        })
+        
+            # Sort all results by score and return top_k
+            all_results.sort(key=lambda x: x["score"], reverse=True)
+            logger.debug(f"Found {len(all_results)} results above threshold")
+        return all_results[:top_k]
+    except Exception as e:
+        logger.error(f"Error searching: {e}")
+        return []
+
+def search_index_by_queries(file_id: str, queries: List[str], query_embeddings: np.ndarray,
+                            top_k: int = 5) -> List[List[Dict]]:
+    """Search one file's stored embeddings for several queries at once.
+
+    The file is loaded once and every query is scored with one matrix
+    product; returns one result list per query, ranked like
+    search_across_indices.
+    """
+    with stage("retrieval"):
+        embeddings, chunks = load_embeddings_and_chunks(file_id)
+        if embeddings is None or chunks is None or not queries:
+            return [[] for _ in queries]
+
+        similarities = cosine_similarity(query_embeddings, embeddings)
+        results = []
+        for query, row in zip(queries, similarities):
+            query_results = []
+            for idx in np.argsort(row)[-top_k:][::-1]:
+                base_score = float(row[idx])
+                relevance_score = calculate_relevance_score(chunks[idx], query, base_score)
                 if relevance_score >= MIN_SCORE_THRESHOLD:
-                    all_results.append({
+                    query_results.append({
                         "file_id": file_id,
                         "chunk": chunks[idx],
-                        "distance": 1 - base_score,  # Convert similarity to distance
+                        "chunk_index": int(idx),
+                        "distance": 1 - base_score,
                         "score": relevance_score
                     })
-        
-        # Sort all results by score and return top_k
-        all_results.sort(key=lambda x: x["score"], reverse=True)
-        print(f"Debug - Found {len(all_results)} results above threshold")
-        return all_results[:top_k]
-    except Exception as e:
-        print(f"Error searching: {e}")
-        return []
+            query_results.sort(key=lambda x: x["score"], reverse=True)
+            results.append(query_results)
+    return results
 
 # # Example usage:
 # if __name__ == "__main__":
@@ -1,43 +1,21 @@
 import os
-import requests
+import io
+import logging
 from openai import OpenAI
 import docx
 import pdfplumber
-import easyocr
 from bs4 import BeautifulSoup
-from youtube_transcript_api import YouTubeTranscriptApi
 from PIL import Image
-from urllib.parse import urlparse
 from app import app
-import re
+from app.utils.ocr import MIN_PAGE_CHARS, ocr_images, ocr_pdf_pages
+from app.utils.web_fetch import fetch_url
+from app.utils.text_normalize import normalize_text, normalize_text_stream
+from app.utils.youtube import format_offset, get_transcript_segments, parse_youtube_video_id
+
+logger = logging.getLogger(__name__)
 
 # Set OpenAI API Key (if using AI-based text processing)
-client = OpenAI(api_key=app.config["OPENAI_API_KEY"])
-
-# Initialize EasyOCR reader
-reader = easyocr.Reader(['en'])
-
-def normalize_text(text):
-    """Normalize text by removing extra whitespace, normalizing line breaks, and cleaning up special characters."""
-    if not text:
-        return ""
-    
-    # Replace multiple spaces with a single space
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Normalize line breaks (convert different types of line breaks to \n)
-    text = re.sub(r'\r\n|\r', '\n', text)
-    
-    # Remove multiple consecutive line breaks
-    text = re.sub(r'\n\s*\n', '\n\n', text)
-    
-    # Clean up special characters but keep basic punctuation
-    text = re.sub(r'[^\w\s.,!?-]', '', text)
-    
-    # Remove leading/trailing whitespace
-    text = text.strip()
-    
-    return text
+client = OpenAI(api_key=app.config["OPENAI_API_KEY"], base_url=app.config["OPENAI_BASE_URL"])
 
 # get embedding from openai text-ada model
 def get_embedding(text):
@@ -46,25 +24,46 @@ def get_embedding(text):
     return response.data[0].embedding
 
 
+def _as_stream(source):
+    """Wrap raw bytes so libraries that take a path or a file object can read them."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+
+def _read_bytes(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, "read"):
+        source.seek(0)
+        return source.read()
+    with open(source, "rb") as file:
+        return file.read()
+
+
+# The extractors below accept a path, bytes or a seekable file object,
+# so uploads are read straight from the request stream
 # Function to extract text from PDF
 def extract_text_from_pdf(pdf_path):
     try:
-        text = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-        return normalize_text(text)
+        with pdfplumber.open(_as_stream(pdf_path)) as pdf:
+            page_texts = [page.extract_text() or "" for page in pdf.pages]
+            # Scanned pages have no text layer, rasterize and OCR them
+            scanned = [i for i, page_text in enumerate(page_texts) if len(page_text.strip()) < MIN_PAGE_CHARS]
+            for i, page_text in zip(scanned, ocr_pdf_pages(pdf, scanned)):
+                page_texts[i] = page_text
+        # Normalize page by page instead of concatenating one large string first
+        return "".join(normalize_text_stream(page_text + "\n" for page_text in page_texts))
     except Exception as e:
-        print(f"Error extracting text from PDF: {str(e)}")
+        logger.error(f"Error extracting text from PDF: {str(e)}")
         return f"Error extracting text from PDF: {str(e)}"
 
 
 # Function to extract text from TXT file
 def extract_text_from_txt(txt_path):
     try:
-        with open(txt_path, "r", encoding="utf-8") as file:
-            text = file.read()
-            return normalize_text(text)
+        text = _read_bytes(txt_path).decode("utf-8")
+        return normalize_text(text)
     except Exception as e:
         return f"Error reading TXT file: {e}"
 
@@ -72,7 +71,7 @@ def extract_text_from_txt(txt_path):
 # Function to extract text from DOCX file
 def extract_text_from_docx(docx_path):
     try:
-        doc = docx.Document(docx_path)
+        doc = docx.Document(_as_stream(docx_path))
         text = "\n".join([para.text for para in doc.paragraphs])
         return normalize_text(text)
     except Exception as e:
@@ -82,38 +81,109 @@ def extract_text_from_docx(docx_path):
 # Function to extract text from an image (OCR)
 def extract_text_from_image(image_path):
     try:
-        # Read the image
-        result = reader.readtext(image_path)
-        # Extract text from the result
-        text = "\n".join([item[1] for item in result])
+        with Image.open(_as_stream(image_path)) as image:
+            text = ocr_images([image])[0]
         return normalize_text(text) if text else "No text found in image."
     except Exception as e:
-        print(f"Error extracting text from image: {str(e)}")
+        logger.error(f"Error extracting text from image: {str(e)}")
         return f"Error extracting text from image: {str(e)}"
 
 
+FILE_EXTRACTORS = {
+    "pdf": extract_text_from_pdf,
+    "txt": extract_text_from_txt,
+    "docx": extract_text_from_docx,
+    "jpg": extract_text_from_image,
+    "jpeg": extract_text_from_image,
+    "png": extract_text_from_image,
+}
+
+
+# The extractors report failures as text rather than raising
+EXTRACTION_ERROR_PREFIXES = (
+    "Error extracting",
+    "Error reading",
+    "Error fetching",
+    "No text found",
+    "No text content found",
+    "No subtitles available",
+)
+
+
+def is_extraction_error(text):
+    """True if text is an extractor's failure message instead of content."""
+    return text.startswith(EXTRACTION_ERROR_PREFIXES)
+
+
+def extract_text_from_file(source, file_extension):
+    """Extract text from a path, bytes or file object by extension; None if unsupported."""
+    extractor = FILE_EXTRACTORS.get(file_extension.lower())
+    if extractor is None:
+        return None
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return extractor(source)
+
+
 # Function to extract text from a web page
 def extract_text_from_webpage(url):
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, "html.parser")
-            text = " ".join([p.text for p in soup.find_all("p")])
-            return normalize_text(text) if text else "No text content found."
+        status_code, body = fetch_url(url)
+        if status_code == 200:
+            return _text_from_html(body)
         else:
-            return f"Error fetching webpage: {response.status_code}"
+            return f"Error fetching webpage: {status_code}"
     except Exception as e:
         return f"Error extracting text from webpage: {e}"
 
 
+def _text_from_html(html):
+    soup = BeautifulSoup(html, "html.parser")
+    text = " ".join([p.text for p in soup.find_all("p")])
+    return normalize_text(text) if text else "No text content found."
+
+
+TRANSCRIPT_PARAGRAPH_SECONDS = 60
+
+
+def is_youtube_link(link):
+    """Check if the link is a valid YouTube link."""
+    return parse_youtube_video_id(link) is not None
+
+
+def transcript_to_text(segments, paragraph_seconds=TRANSCRIPT_PARAGRAPH_SECONDS):
+    """Join transcript segments into paragraphs that start with their time offset.
+
+    Chunking splits on paragraph breaks, so every chunk carries the offset of
+    the part of the video it came from.
+    """
+    paragraphs = []
+    current = []
+    paragraph_start = None
+    for segment in segments:
+        text = normalize_text(segment["text"])
+        if not text:
+            continue
+        if paragraph_start is None:
+            paragraph_start = segment["start"]
+        elif segment["start"] - paragraph_start >= paragraph_seconds:
+            paragraphs.append(f"[{format_offset(paragraph_start)}] " + " ".join(current))
+            current = []
+            paragraph_start = segment["start"]
+        current.append(text)
+    if current:
+        paragraphs.append(f"[{format_offset(paragraph_start)}] " + " ".join(current))
+    return "\n\n".join(paragraphs)
+
+
 # Function to extract subtitles from a YouTube video
-def extract_text_from_youtube(youtube_url):
+def extract_text_from_youtube(youtube_url, language="en"):
     try:
-        video_id = urlparse(youtube_url).query.split("v=")[-1]
-        transcript = YouTubeTranscriptApi.get_transcript(video_id)
-        text = "\n".join([entry["text"] for entry in transcript])
-        return normalize_text(text) if text else "No subtitles available."
+        video_id = parse_youtube_video_id(youtube_url)
+        if not video_id:
+            return "Error extracting subtitles from YouTube: not a YouTube video link"
+        text = transcript_to_text(get_transcript_segments(video_id, language))
+        return text if text else "No subtitles available."
     except Exception as e:
         return f"Error extracting subtitles from YouTube: {e}"
 
@@ -136,7 +206,7 @@ def process_input(input_value):
             return "Unsupported file format."
 
     elif input_value.startswith("http"):  # If input is a URL
-        if "youtube.com" in input_value or "youtu.be" in input_value:
+        if is_youtube_link(input_value):
             text = extract_text_from_youtube(input_value)
         else:
             text = extract_text_from_webpage(input_value)
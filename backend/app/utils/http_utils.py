@@ -0,0 +1,37 @@
+import hashlib
+import tempfile
+from flask import Request, current_app, jsonify, request
+
+
+def conditional_json(payload, headers=None):
+    """
+    Return a JSON response with an ETag, or 304 when it matches If-None-Match.
+    """
+    response = jsonify(payload)
+    if headers:
+        response.headers.update(headers)
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    return response.make_conditional(request)
+
+
+def parse_limit(value, default=None, maximum=500):
+    """
+    Parse a page size query parameter, clamped to [1, maximum].
+    """
+    if value is None or value == "":
+        return default
+    return max(1, min(int(value), maximum))
+
+
+class SpoolingRequest(Request):
+    """
+    Keep uploaded files in memory up to UPLOAD_SPOOL_THRESHOLD bytes.
+
+    Werkzeug spools every upload above 500 KB to a temporary file; extraction
+    reads the stream directly, so only really large files need the disk.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(
+            max_size=current_app.config["UPLOAD_SPOOL_THRESHOLD"], mode="rb+"
+        )
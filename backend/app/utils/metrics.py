@@ -0,0 +1,136 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from app.utils.timing import StageTimer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ["endpoint", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_LATENCY = Histogram(
+    "stage_duration_seconds",
+    "Time spent in a named processing stage",
+    ["endpoint", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+OUTBOUND_IN_FLIGHT = Gauge(
+    "outbound_requests_in_flight",
+    "Outbound requests currently waiting on an external service",
+    ["service"],
+    multiprocess_mode="livesum",
+)
+OCR_PAGES = Counter(
+    "ocr_pages_total",
+    "Pages and images run through OCR",
+)
+OCR_SECONDS = Counter(
+    "ocr_seconds_total",
+    "Wall time spent in OCR; rate(ocr_pages_total) / rate(ocr_seconds_total) is pages per second",
+)
+
+# Timer of the request being served; copied into worker threads with copy_context()
+_current_timer = contextvars.ContextVar("current_timer", default=None)
+
+
+def current_timer():
+    return _current_timer.get()
+
+
+@contextmanager
+def stage(name):
+    """Time a named stage into the current request's timer and the stage histogram."""
+    timer = _current_timer.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        endpoint = timer.endpoint if timer else "background"
+        if timer:
+            timer.record(name, elapsed)
+        STAGE_LATENCY.labels(endpoint, name).observe(elapsed)
+
+
+@contextmanager
+def outbound(service, stage_name=None):
+    """Track an outbound call as in flight and time it as a stage."""
+    OUTBOUND_IN_FLIGHT.labels(service).inc()
+    try:
+        with stage(stage_name or service):
+            yield
+    finally:
+        OUTBOUND_IN_FLIGHT.labels(service).dec()
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+
+def record_ocr(pages, seconds):
+    OCR_PAGES.inc(pages)
+    OCR_SECONDS.inc(seconds)
+
+def _server_timing(timings):
+    return ", ".join(f"{name};dur={duration}" for name, duration in timings.items())
+
+
+def metrics_endpoint():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Aggregate the samples written by every gunicorn worker
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """Register the per-request timer, the Server-Timing header and /metrics."""
+
+    @app.before_request
+    def start_request_timer():
+        timer = StageTimer(request.endpoint or "unknown")
+        g.stage_timer = timer
+        g.stage_timer_token = _current_timer.set(timer)
+
+    @app.after_request
+    def finish_request_timer(response):
+        timer = g.pop("stage_timer", None)
+        if timer is None:
+            return response
+        timings = timer.to_dict()
+        response.headers["Server-Timing"] = _server_timing(timings)
+        REQUEST_LATENCY.labels(timer.endpoint, request.method, response.status_code).observe(
+            timer.total()
+        )
+        return response
+
+    @app.teardown_request
+    def reset_request_timer(exc):
+        token = g.pop("stage_timer_token", None)
+        if token is not None:
+            _current_timer.reset(token)
+
+    app.add_url_rule("/metrics", "metrics", metrics_endpoint, methods=["GET"])
@@ -0,0 +1,66 @@
+import hashlib
+import logging
+
+from app import db
+from app.models.notebook_digest import NotebookDigest
+from app.helper.ai_generate import build_summary_prompt, openai_generate
+from app.utils.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _sha256(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def source_set_key(sources) -> str:
+    return _sha256(",".join(str(source.id) for source in sorted(sources, key=lambda s: s.id)))
+
+
+def source_set_fingerprint(sources) -> str:
+    return _sha256(",".join(
+        f"{source.id}:{source.updated_at.isoformat() if source.updated_at else ''}"
+        for source in sorted(sources, key=lambda s: s.id)
+    ))
+
+
+def get_notebook_digest(notebook_id, sources) -> str:
+    """Return the summary over a set of sources, computing it only when they changed.
+
+    The digest is stored per (notebook, source set) and recomputed when any
+    source's updated_at moves, so the no-match chat fallback costs no extra
+    LLM call once warm. When the LLM call fails the source summaries are
+    returned as they are and nothing is stored, so the next request retries.
+    """
+    key = source_set_key(sources)
+    fingerprint = source_set_fingerprint(sources)
+
+    cached = NotebookDigest.query.filter_by(notebook_id=notebook_id, source_set_key=key).first()
+    if cached and cached.fingerprint == fingerprint:
+        record_cache("notebook_digest", True)
+        return cached.digest
+    record_cache("notebook_digest", False)
+
+    context = "\n\n".join(
+        f"Summary of {source.title}:\n{source.description}" for source in sources
+    )
+    try:
+        digest = openai_generate(build_summary_prompt(context, True), False, summary=True)
+    except Exception as e:
+        logger.error(f"Error generating digest for notebook {notebook_id}: {str(e)}")
+        digest = None
+    if not digest:
+        return context
+
+    if cached:
+        cached.fingerprint = fingerprint
+        cached.digest = digest
+    else:
+        db.session.add(NotebookDigest(
+            notebook_id=notebook_id,
+            source_set_key=key,
+            fingerprint=fingerprint,
+            digest=digest,
+        ))
+    db.session.commit()
+    return digest
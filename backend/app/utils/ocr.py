@@ -0,0 +1,113 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import easyocr
+import numpy as np
+from PIL import Image
+
+from config import Config
+from app.utils.metrics import record_ocr, stage
+
+logger = logging.getLogger(__name__)
+
+# Initialize EasyOCR reader on the CPU; the bounded ocr_executor is sized for cores
+reader = easyocr.Reader(['en'], gpu=False)
+
+MAX_IMAGE_SIDE = 2500  # pixels, for images without DPI information
+MIN_PAGE_CHARS = 20  # PDF pages with less extracted text are treated as scanned
+
+# Bounded so OCR cannot take every core from the request workers
+ocr_executor = ThreadPoolExecutor(max_workers=Config.OCR_WORKERS, thread_name_prefix="ocr")
+
+
+def prepare_image(image, source_dpi=None, target_dpi=None):
+    """Convert an image to grayscale and downsample it to the target DPI.
+
+    Scans often come in at 300-600 DPI; OCR is as accurate at 200 DPI and
+    the cost grows with the pixel count.
+    """
+    target_dpi = target_dpi or Config.OCR_TARGET_DPI
+    if source_dpi is None:
+        dpi = image.info.get("dpi")
+        source_dpi = dpi[0] if dpi else None
+
+    if source_dpi:
+        scale = target_dpi / source_dpi
+    else:
+        scale = MAX_IMAGE_SIDE / max(image.size)
+    image = image.convert("L")
+    if scale < 1:
+        image = image.resize(
+            (max(round(image.width * scale), 1), max(round(image.height * scale), 1)),
+            Image.LANCZOS,
+        )
+    return np.asarray(image)
+
+
+def _pad(arrays):
+    # readtext_batched needs equally sized images; pad with white instead of stretching
+    height = max(array.shape[0] for array in arrays)
+    width = max(array.shape[1] for array in arrays)
+    padded = []
+    for array in arrays:
+        canvas = np.full((height, width), 255, dtype=np.uint8)
+        canvas[:array.shape[0], :array.shape[1]] = array
+        padded.append(canvas)
+    return padded
+
+
+def _ocr_batch(arrays):
+    results = reader.readtext_batched(_pad(arrays), batch_size=len(arrays))
+    return ["\n".join(item[1] for item in result) for result in results]
+
+
+def _ocr_arrays(arrays):
+    # Similar sizes share a batch so little of each batch is padding
+    order = sorted(range(len(arrays)), key=lambda i: arrays[i].shape)
+    batches = [order[i:i + Config.OCR_BATCH_SIZE] for i in range(0, len(order), Config.OCR_BATCH_SIZE)]
+    futures = [ocr_executor.submit(_ocr_batch, [arrays[i] for i in batch]) for batch in batches]
+    texts = [""] * len(arrays)
+    for batch, future in zip(batches, futures):
+        for i, text in zip(batch, future.result()):
+            texts[i] = text
+    return texts
+
+
+def _report(pages, elapsed):
+    record_ocr(pages, elapsed)
+    logger.info(f"OCR {pages} pages in {elapsed:.2f}s ({pages / elapsed if elapsed else 0:.2f} pages/s)")
+
+
+def ocr_images(images):
+    """OCR PIL images in batches, returning one text per image."""
+    if not images:
+        return []
+    start = time.perf_counter()
+    with stage("ocr"):
+        texts = _ocr_arrays([prepare_image(image) for image in images])
+    _report(len(images), time.perf_counter() - start)
+    return texts
+
+
+def ocr_pdf_pages(pdf, page_numbers):
+    """Rasterize the given pdfplumber pages at the target DPI and OCR them.
+
+    Pages are rasterized a window at a time so a long scan never holds
+    every page image in memory.
+    """
+    if not page_numbers:
+        return []
+    dpi = Config.OCR_TARGET_DPI
+    window = Config.OCR_BATCH_SIZE * Config.OCR_WORKERS
+    start = time.perf_counter()
+    texts = []
+    with stage("ocr"):
+        for offset in range(0, len(page_numbers), window):
+            arrays = [
+                prepare_image(pdf.pages[number].to_image(resolution=dpi).original, source_dpi=dpi)
+                for number in page_numbers[offset:offset + window]
+            ]
+            texts.extend(_ocr_arrays(arrays))
+    _report(len(page_numbers), time.perf_counter() - start)
+    return texts
@@ -0,0 +1,135 @@
+import re
+from typing import Dict, List, Optional
+
+from app.utils.embed_and_search import create_embeddings, encoding, search_index_by_queries, split_into_chunks
+
+DEFAULT_TOKEN_BUDGET = 6000
+SUMMARY_BUDGET_RATIO = 0.35  # Share of the budget reserved for the stored source summaries
+MAX_TOPICS_PER_SOURCE = 5
+CHUNKS_PER_TOPIC = 2
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the same tiktoken encoding used for chunking."""
+    return len(encoding.encode(text)) if text else 0
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens tokens."""
+    if max_tokens <= 0 or not text:
+        return ""
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def extract_topics(summary: str, max_topics: int = MAX_TOPICS_PER_SOURCE) -> List[str]:
+    """Use the sentences of a source summary as topic queries."""
+    if not summary:
+        return []
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(summary) if len(s.strip().split()) >= 4]
+    return sentences[:max_topics]
+
+
+def _source_field(source, name: str, default=None):
+    if isinstance(source, dict):
+        return source.get(name, default)
+    return getattr(source, name, default)
+
+
+def _topics(source, index: int) -> List[str]:
+    title = _source_field(source, 'title') or f"Source {index + 1}"
+    return extract_topics(_source_field(source, 'description') or "") or [title]
+
+
+def _select_chunks(source, index: int, topics: List[str], topic_embeddings) -> List[Dict]:
+    """Return the most salient chunks of one source, best first, one group per topic."""
+    title = _source_field(source, 'title') or f"Source {index + 1}"
+    file_id = _source_field(source, 'file_id')
+    content = _source_field(source, 'content')
+
+    if not file_id:
+        # Raw content without stored embeddings: keep the leading chunks
+        if not content:
+            return []
+        return [
+            {"title": title, "chunk": chunk, "score": 0.0, "rank": rank}
+            for rank, chunk in enumerate(split_into_chunks(content))
+        ]
+
+    if topic_embeddings is None:
+        return []
+    selected = []
+    seen = set()
+    per_topic = search_index_by_queries(file_id, topics, topic_embeddings, top_k=CHUNKS_PER_TOPIC)
+    for rank, results in enumerate(per_topic):
+        for result in results:
+            if result['chunk'] in seen:
+                continue
+            seen.add(result['chunk'])
+            selected.append({"title": title, "chunk": result['chunk'], "score": result['score'], "rank": rank})
+    return selected
+
+
+def build_podcast_context(sources: List, token_budget: Optional[int] = None) -> str:
+    """Build the source section of the podcast prompt within a token budget.
+
+    Every source contributes its stored summary first, then the chunks that best
+    match the topics of that summary are added round-robin across sources until
+    the budget is spent, so large notebooks cost about the same as small ones.
+    The topics of all sources are embedded in one model call and each source's
+    embeddings are loaded and scored once.
+    """
+    budget = token_budget or DEFAULT_TOKEN_BUDGET
+    summary_budget = int(budget * SUMMARY_BUDGET_RATIO)
+    per_summary = max(summary_budget // max(len(sources), 1), 1)
+
+    sections = []
+    used = 0
+    for i, source in enumerate(sources):
+        title = _source_field(source, 'title') or f"Source {i + 1}"
+        summary = truncate_to_tokens(_source_field(source, 'description') or "", per_summary)
+        header = f"Source {i + 1} ({title})"
+        sections.append({"header": header, "summary": summary, "excerpts": []})
+        used += count_tokens(header) + count_tokens(summary)
+
+    topics = [_topics(source, i) if _source_field(source, 'file_id') else [] for i, source in enumerate(sources)]
+    all_topics = [topic for source_topics in topics for topic in source_topics]
+    embeddings = create_embeddings(all_topics) if all_topics else None
+    candidates = []
+    offset = 0
+    for i, source in enumerate(sources):
+        count = len(topics[i])
+        topic_embeddings = embeddings[offset:offset + count] if embeddings is not None else None
+        candidates.append(_select_chunks(source, i, topics[i], topic_embeddings))
+        offset += count
+    position = 0
+    while used < budget and any(position < len(c) for c in candidates):
+        for i, source_chunks in enumerate(candidates):
+            if position >= len(source_chunks):
+                continue
+            chunk = source_chunks[position]['chunk']
+            cost = count_tokens(chunk)
+            if used + cost > budget:
+                remaining = budget - used
+                if remaining > 50:
+                    sections[i]["excerpts"].append(truncate_to_tokens(chunk, remaining))
+                    used = budget
+                continue
+            sections[i]["excerpts"].append(chunk)
+            used += cost
+        position += 1
+
+    parts = []
+    for section in sections:
+        lines = [f"{section['header']}:"]
+        if section["summary"]:
+            lines.append(f"Summary: {section['summary']}")
+        if section["excerpts"]:
+            lines.append("Key excerpts:")
+            lines.extend(f"- {excerpt}" for excerpt in section["excerpts"])
+        parts.append("\n".join(lines))
+    return "\n\n".join(parts)
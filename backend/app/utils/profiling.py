@@ -0,0 +1,208 @@
+import contextvars
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+PROFILE_HEADER = "X-Profile"
+
+# Sampler of the request being profiled; worker pools that submit with
+# copy_context() see it and register their threads through track_worker()
+_current_sampler = contextvars.ContextVar("current_sampler", default=None)
+
+
+class StackSampler:
+    """Samples the Python stacks of a request's threads at a fixed interval.
+
+    The request thread is sampled from the start; worker threads are added
+    while they run a task for the request. Each stack is rooted at its
+    thread's name and kept in collapsed form ("outer;inner;leaf count"), the
+    input format of flamegraph.pl, speedscope and similar viewers.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._threads = {thread_id: "request"}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def add_thread(self, thread_id, name):
+        with self._lock:
+            self._threads[thread_id] = name
+
+    def remove_thread(self, thread_id):
+        with self._lock:
+            self._threads.pop(thread_id, None)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = list(self._threads.items())
+            frames = sys._current_frames()
+            sampled = False
+            for thread_id, name in threads:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(name)
+                self.stacks[";".join(reversed(stack))] += 1
+                sampled = True
+            if sampled:
+                self.samples += 1
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+def track_worker(func, *args, **kwargs):
+    """Run func, sampling this worker thread if the submitting request is profiled.
+
+    Meant to run inside the request's copied context, e.g.
+    ``executor.submit(contextvars.copy_context().run, track_worker, func, ...)``.
+    """
+    sampler = _current_sampler.get()
+    if sampler is None:
+        return func(*args, **kwargs)
+    thread_id = threading.get_ident()
+    sampler.add_thread(thread_id, threading.current_thread().name)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        sampler.remove_thread(thread_id)
+
+
+def _is_admin():
+    from app.models.user import User
+
+    try:
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+    except Exception:
+        return False
+    if not user_id:
+        return False
+    user = User.query.get(int(user_id))
+    return bool(user and user.role == "admin")
+
+
+def _should_profile(app):
+    if request.headers.get(PROFILE_HEADER) and _is_admin():
+        return True
+    rate = app.config.get("PROFILE_SAMPLE_RATE", 0.0)
+    return rate > 0 and random.random() < rate
+
+
+def _profile_names(profile_dir):
+    """Sidecar file names, oldest first; profile ids start with their timestamp."""
+    if not os.path.isdir(profile_dir):
+        return []
+    return sorted(name for name in os.listdir(profile_dir) if name.endswith(".json"))
+
+
+def list_profiles(profile_dir, limit=50):
+    """Metadata of the most recent profiles, newest first."""
+    entries = []
+    for name in reversed(_profile_names(profile_dir)[-limit:]):
+        try:
+            with open(os.path.join(profile_dir, name), encoding="utf-8") as f:
+                entries.append(json.load(f))
+        except (OSError, ValueError):
+            # Pruned or still being written by another worker
+            continue
+    return entries
+
+
+def _prune_profiles(profile_dir, max_files):
+    """Delete the oldest profiles so at most max_files are kept."""
+    names = _profile_names(profile_dir)
+    for name in names[:max(0, len(names) - max_files)]:
+        profile_id = name[:-len(".json")]
+        for suffix in (".json", ".collapsed"):
+            try:
+                os.remove(os.path.join(profile_dir, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def _write_profile(profile_dir, sampler, duration, status):
+    os.makedirs(profile_dir, exist_ok=True)
+    profile_id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}_{request.endpoint}_{uuid.uuid4().hex[:8]}"
+    with open(os.path.join(profile_dir, f"{profile_id}.collapsed"), "w", encoding="utf-8") as f:
+        f.write(sampler.collapsed())
+    metadata = {
+        "id": profile_id,
+        "endpoint": request.endpoint,
+        "method": request.method,
+        "path": request.path,
+        "status": status,
+        "duration_ms": round(duration * 1000, 1),
+        "samples": sampler.samples,
+        "interval_ms": round(sampler.interval * 1000, 1),
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    with open(os.path.join(profile_dir, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(metadata, f)
+    return profile_id
+
+
+def init_profiling(app):
+    """Profile requests flagged by an admin's X-Profile header or picked by sampling."""
+
+    @app.before_request
+    def start_profiler():
+        if request.method == "OPTIONS" or not _should_profile(app):
+            return
+        sampler = StackSampler(threading.get_ident(), app.config.get("PROFILE_INTERVAL_MS", 5) / 1000)
+        sampler.start()
+        g.profiler = (sampler, time.perf_counter(), _current_sampler.set(sampler))
+
+    @app.after_request
+    def stop_profiler(response):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return response
+        sampler, start, token = profiler
+        sampler.stop()
+        _current_sampler.reset(token)
+        try:
+            profile_id = _write_profile(
+                app.config["PROFILE_DIR"], sampler, time.perf_counter() - start, response.status_code
+            )
+            response.headers["X-Profile-Id"] = profile_id
+            _prune_profiles(app.config["PROFILE_DIR"], app.config.get("PROFILE_MAX_FILES", 500))
+        except Exception as e:
+            app.logger.error(f"Error writing profile: {str(e)}")
+        return response
+
+    @app.teardown_request
+    def discard_profiler(exc):
+        # after_request is skipped when the view raised; stop the sampler
+        # so neither it nor the context variable outlives the request
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            sampler, _, token = profiler
+            sampler.stop()
+            _current_sampler.reset(token)
@@ -0,0 +1,18 @@
+import threading
+
+_ready = threading.Event()
+
+
+def warm_up_models():
+    """Run each model once so lazy initialisation happens before serving traffic."""
+    import numpy as np
+    from app.utils.embed_and_search import create_embedding
+    from app.utils.ocr import reader
+
+    create_embedding("warm up")
+    reader.readtext(np.zeros((32, 32, 3), dtype=np.uint8))
+    _ready.set()
+
+
+def models_ready():
+    return _ready.is_set()
@@ -0,0 +1,58 @@
+import re
+
+# Runs of whitespace and of characters we drop (anything but word characters
+# and basic punctuation). A lone space or line break between two kept
+# characters is already normal, so the lookahead skips it without a callback.
+_RUN = re.compile(r"(?![ \n](?=[\w.,!?-]))[^\w.,!?-]+")
+_WHITESPACE = re.compile(r"\s")
+_KEEP = re.compile(r"[\w.,!?-]")
+
+
+def _replace_run(match):
+    run = match.group()
+    newlines = run.count("\n") + run.count("\r") - run.count("\r\n")
+    if newlines >= 2:
+        return "\n\n"
+    if newlines == 1:
+        return "\n"
+    return " " if _WHITESPACE.search(run) else ""
+
+
+def normalize_text(text):
+    """Normalize text by removing extra whitespace, normalizing line breaks, and cleaning up special characters.
+
+    Runs of spaces become one space, line breaks are kept and blank lines
+    collapse to a single paragraph break, so split_into_chunks still sees
+    paragraphs.
+    """
+    if not text:
+        return ""
+    return _RUN.sub(_replace_run, text).strip()
+
+
+def normalize_text_stream(pieces):
+    """Normalize an iterable of text pieces, yielding normalized text.
+
+    The output joins to exactly normalize_text("".join(pieces)). A trailing
+    run of whitespace or dropped characters is held back until the next piece
+    shows where it ends.
+    """
+    pending = ""
+    started = False
+    for piece in pieces:
+        if not piece:
+            continue
+        pending += piece
+        cut = len(pending)
+        while cut and not _KEEP.match(pending[cut - 1]):
+            cut -= 1
+        if not cut:
+            continue
+        out = _RUN.sub(_replace_run, pending[:cut])
+        pending = pending[cut:]
+        if not started:
+            out = out.lstrip()
+            started = bool(out)
+        if out:
+            yield out
+    # Whatever is still pending is a trailing run, which strip() would drop
@@ -0,0 +1,35 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Collects wall-clock durations of named stages, safe to use across threads."""
+
+    def __init__(self, endpoint=None):
+        self.endpoint = endpoint
+        self.timings = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def total(self):
+        return time.perf_counter() - self._start
+
+    def to_dict(self):
+        """Stage durations in milliseconds, plus the total since creation."""
+        with self._lock:
+            result = {name: round(seconds * 1000, 1) for name, seconds in self.timings.items()}
+        result["total"] = round(self.total() * 1000, 1)
+        return result
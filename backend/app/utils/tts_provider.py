@@ -5,8 +5,16 @@ from gtts import gTTS
 import tempfile
 import uuid
 from config import Config
+from app.utils.metrics import outbound
 from openai import OpenAI
 from pathlib import Path
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 64 * 1024
 
 class TTSProvider(ABC):
     @abstractmethod
@@ -17,9 +25,28 @@ class TTSProvider(ABC):
     def text_to_speech(self, text, voice_id=None):
         pass
 
+    def stream_speech(self, text, voice_id=None):
+        """Yield the audio for text as chunks of bytes.
+
+        Providers with a streaming API override this; the default reads back
+        and removes the file written by text_to_speech.
+        """
+        audio_path = self.text_to_speech(text, voice_id=voice_id)
+        if not audio_path:
+            raise Exception("No audio generated")
+        try:
+            with open(audio_path, 'rb') as f:
+                while True:
+                    chunk = f.read(STREAM_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.remove(audio_path)
+
 class OpenAIProvider(TTSProvider):
     def __init__(self):
-        self.client = OpenAI()
+        self.client = OpenAI(base_url=Config.OPENAI_BASE_URL)
         self.available_voices = [
             "alloy", "echo", "fable", "onyx", "nova", "shimmer"
         ]
@@ -52,9 +79,22 @@ class OpenAIProvider(TTSProvider):
             return temp_path
                 
         except Exception as e:
-            print(f"Error in OpenAI TTS: {str(e)}")
-            # Fall back to GTTS if OpenAI fails
-            return GTTSProvider().text_to_speech(text)
+            logger.error(f"Error in OpenAI TTS: {str(e)}")
+            # The registry decides which fallback provider to use
+            raise
+
+    def stream_speech(self, text, voice_id=None):
+        if not voice_id or voice_id not in self.available_voices:
+            voice_id = "nova"
+
+        # Pass the HTTP body through as it arrives instead of buffering it
+        with self.client.audio.speech.with_streaming_response.create(
+            model="tts-1",
+            voice=voice_id,
+            input=text
+        ) as response:
+            for chunk in response.iter_bytes(STREAM_CHUNK_SIZE):
+                yield chunk
 
 class GoogleProvider(TTSProvider):
     def __init__(self):
@@ -65,45 +105,55 @@ class GoogleProvider(TTSProvider):
             voices = self.client.list_voices().voices
             return [{"voice_id": voice.name, "name": voice.name} for voice in voices]
         except Exception as e:
-            print(f"Error fetching Google voices: {str(e)}")
+            logger.error(f"Error fetching Google voices: {str(e)}")
             return []
             
     def text_to_speech(self, text, voice_id=None):
         try:
-            # Set default voice if none provided
-            if not voice_id:
-                voice_id = "en-US-Standard-A"
-            
-            # Configure the synthesis input
-            synthesis_input = texttospeech.SynthesisInput(text=text)
-            
-            # Build the voice request
-            voice = texttospeech.VoiceSelectionParams(
-                language_code="en-US",
-                name=voice_id
-            )
-            
-            # Select the audio file type
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.MP3
-            )
-            
-            # Perform the text-to-speech request
-            response = self.client.synthesize_speech(
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
-            )
+            audio_content = self._synthesize(text, voice_id)
             
             # Save to temporary file
             with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-                temp_file.write(response.audio_content)
+                temp_file.write(audio_content)
                 return temp_file.name
                 
         except Exception as e:
-            print(f"Error in Google TTS: {str(e)}")
+            logger.error(f"Error in Google TTS: {str(e)}")
             raise
 
+    def stream_speech(self, text, voice_id=None):
+        # Google returns the whole clip in one response; hand it out without touching disk
+        audio_content = self._synthesize(text, voice_id)
+        for start in range(0, len(audio_content), STREAM_CHUNK_SIZE):
+            yield audio_content[start:start + STREAM_CHUNK_SIZE]
+
+    def _synthesize(self, text, voice_id=None):
+        # Set default voice if none provided
+        if not voice_id:
+            voice_id = "en-US-Standard-A"
+        
+        # Configure the synthesis input
+        synthesis_input = texttospeech.SynthesisInput(text=text)
+        
+        # Build the voice request
+        voice = texttospeech.VoiceSelectionParams(
+            language_code="en-US",
+            name=voice_id
+        )
+        
+        # Select the audio file type
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=texttospeech.AudioEncoding.MP3
+        )
+        
+        # Perform the text-to-speech request
+        response = self.client.synthesize_speech(
+            input=synthesis_input,
+            voice=voice,
+            audio_config=audio_config
+        )
+        return response.audio_content
+
 class GTTSProvider(TTSProvider):
     def get_voices(self):
         # gTTS doesn't provide voice selection, return a default voice
@@ -122,9 +172,14 @@ class GTTSProvider(TTSProvider):
 
             return temp_path
         except Exception as e:
-            print(f"Error in gTTS: {str(e)}")
+            logger.error(f"Error in gTTS: {str(e)}")
             return None
 
+    def stream_speech(self, text, voice_id=None):
+        # gTTS yields one MP3 fragment per text part as it is fetched
+        for chunk in gTTS(text=text, lang='en').stream():
+            yield chunk
+
 class MockProvider(TTSProvider):
     """Mock provider for testing"""
     def get_voices(self):
@@ -137,19 +192,172 @@ class MockProvider(TTSProvider):
             temp_file.write(b'\x00' * 1000)  # Just some silence
             return temp_file.name
 
+    def stream_speech(self, text, voice_id=None):
+        yield b'\x00' * 1000
+
+class ProviderHealth:
+    """Health record and circuit breaker for one TTS provider."""
+    def __init__(self, failure_threshold, cooldown_seconds):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.total_successes = 0
+        self.last_error = None
+        self.open_until = 0.0
+        self._lock = threading.Lock()
+
+    def is_available(self):
+        return time.monotonic() >= self.open_until
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.total_successes += 1
+            self.open_until = 0.0
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            self.last_error = str(error) if error else None
+            if self.consecutive_failures >= self.failure_threshold:
+                # Open the circuit: skip this provider until the cooldown expires
+                self.open_until = time.monotonic() + self.cooldown_seconds
+
+    def to_dict(self):
+        return {
+            "available": self.is_available(),
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "total_successes": self.total_successes,
+            "last_error": self.last_error,
+            "retry_in": max(0.0, round(self.open_until - time.monotonic(), 1)),
+        }
+
+class FallbackTTSProvider(TTSProvider):
+    """Tries each registered provider in priority order, skipping open circuits."""
+    def __init__(self, registry, provider_names):
+        self.registry = registry
+        self.provider_names = provider_names
+
+    def _providers(self):
+        for name in self.provider_names:
+            provider = self.registry.get(name)
+            if provider is not None:
+                yield name, provider
+
+    def get_voices(self):
+        for name, provider in self._providers():
+            if self.registry.health(name).is_available():
+                return provider.get_voices()
+        return []
+
+    def text_to_speech(self, text, voice_id=None):
+        for name, provider in self._providers():
+            health = self.registry.health(name)
+            if not health.is_available():
+                continue
+            try:
+                with outbound(f"tts_{name}", "tts"):
+                    audio_path = provider.text_to_speech(text, voice_id=voice_id)
+            except Exception as e:
+                health.record_failure(e)
+                continue
+            if audio_path:
+                health.record_success()
+                return audio_path
+            health.record_failure("no audio returned")
+        return None
+
+    def stream_speech(self, text, voice_id=None):
+        # Fall back only until the first chunk arrives; after that the audio is committed
+        for name, provider in self._providers():
+            health = self.registry.health(name)
+            if not health.is_available():
+                continue
+            chunks = provider.stream_speech(text, voice_id=voice_id)
+            try:
+                # Time to first byte is what the caller waits on
+                with outbound(f"tts_{name}", "tts"):
+                    first_chunk = next(chunks)
+            except StopIteration:
+                health.record_failure("no audio returned")
+                continue
+            except Exception as e:
+                health.record_failure(e)
+                continue
+            try:
+                yield first_chunk
+                for chunk in chunks:
+                    yield chunk
+            except Exception as e:
+                health.record_failure(e)
+                raise
+            health.record_success()
+            return
+        raise Exception("No TTS provider could generate audio")
+
+class TTSProviderRegistry:
+    """Process-wide TTS provider singletons with per-provider health tracking."""
+    def __init__(self, failure_threshold=3, cooldown_seconds=60):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._factories = {}
+        self._instances = {}
+        self._health = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory):
+        self._factories[name] = factory
+        self._health.setdefault(name, ProviderHealth(self.failure_threshold, self.cooldown_seconds))
+
+    def health(self, name):
+        return self._health[name]
+
+    def get(self, name):
+        """Return the shared instance for a provider, creating it on first use."""
+        if name in self._instances:
+            return self._instances[name]
+        health = self._health[name]
+        if not health.is_available():
+            return None
+        with self._lock:
+            if name not in self._instances:
+                try:
+                    self._instances[name] = self._factories[name]()
+                except Exception as e:
+                    logger.exception(f"Error initializing {name} TTS provider: {str(e)}")
+                    health.record_failure(e)
+                    return None
+        return self._instances[name]
+
+    def status(self):
+        return {name: health.to_dict() for name, health in self._health.items()}
+
+registry = TTSProviderRegistry(
+    failure_threshold=Config.TTS_FAILURE_THRESHOLD,
+    cooldown_seconds=Config.TTS_COOLDOWN_SECONDS,
+)
+registry.register("openai", OpenAIProvider)
+registry.register("google", GoogleProvider)
+registry.register("gtts", GTTSProvider)
+registry.register("mock", MockProvider)
+
+def _provider_chain():
+    # OpenAI is the first priority, Google Cloud TTS second, gTTS the free fallback
+    names = ["openai"]
+    if os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
+        names.append("google")
+    names.append("gtts")
+    return names
+
+_default_provider = FallbackTTSProvider(registry, _provider_chain())
+
 def get_tts_provider():
-    """Factory function to get the appropriate TTS provider"""
-    try:
-        # OpenAI is the first priority
-        return OpenAIProvider()
-    except Exception as e:
-        print(f"Error initializing OpenAI TTS provider: {str(e)}")
-        try:
-            # Google Cloud TTS as second priority
-            if os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
-                return GoogleProvider()
-            else:
-                return GTTSProvider()  # Free fallback
-        except Exception as e:
-            print(f"Error initializing fallback TTS provider: {str(e)}")
-            return MockProvider() 
\ No newline at end of file
+    """Return the shared TTS provider that falls back across registered providers"""
+    return _default_provider
+
+def get_tts_health():
+    """Health and circuit-breaker state of every registered TTS provider"""
+    return registry.status()
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import Config
+from app.utils.metrics import outbound, record_cache
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0"
+READ_CHUNK_SIZE = 64 * 1024
+
+CACHE_DIR = Path(Config.WEB_CACHE_DIR)
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+
+class ResponseTooLarge(Exception):
+    pass
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=Config.WEB_POOL_SIZE,
+        pool_maxsize=Config.WEB_POOL_SIZE,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504], allowed_methods=["GET"]),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+# One pooled session per process; keep-alive connections are reused across requests
+session = _build_session()
+# Bounds concurrent link fetches across all requests, e.g. bulk ingestion
+fetch_executor = ThreadPoolExecutor(max_workers=Config.WEB_FETCH_CONCURRENCY, thread_name_prefix="fetch")
+
+
+def _cache_path(url):
+    # One file per URL: a JSON metadata line followed by the raw body, so
+    # the validators and the body they describe are always replaced together
+    return CACHE_DIR / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.cache"
+
+
+def _load_cached(url):
+    try:
+        with open(_cache_path(url), "rb") as f:
+            meta = json.loads(f.readline())
+            return meta, f.read()
+    except (OSError, ValueError):
+        return None, None
+
+
+def _store_cached(url, response, body):
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not etag and not last_modified:
+        # Nothing to revalidate against
+        return
+    path = _cache_path(url)
+    meta = {"url": url, "etag": etag, "last_modified": last_modified, "fetched_at": time.time()}
+    # Unique temp name: threads of one process may store the same URL at once
+    temp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        # Write then rename so concurrent readers never see half a file
+        with open(temp_path, "wb") as f:
+            f.write(json.dumps(meta).encode("utf-8") + b"\n")
+            f.write(body)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not cache {url}: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return
+    _prune_cache(Config.WEB_CACHE_MAX_FILES)
+
+
+def _touch_cached(url):
+    # Revalidated pages count as recently used when the cache is pruned
+    try:
+        os.utime(_cache_path(url))
+    except OSError:
+        pass
+
+
+def _prune_cache(max_files):
+    """Delete the least recently used pages so at most max_files are kept."""
+    entries = []
+    for entry in os.scandir(CACHE_DIR):
+        if entry.name.endswith(".cache"):
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                continue
+    if len(entries) <= max_files:
+        return
+    entries.sort()
+    for _, path in entries[:len(entries) - max_files]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Another worker pruned it first
+            pass
+
+
+def _read_limited(response):
+    declared = response.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > Config.WEB_MAX_RESPONSE_BYTES:
+        raise ResponseTooLarge(f"Response of {declared} bytes exceeds the limit")
+    deadline = time.monotonic() + Config.WEB_READ_TIMEOUT
+    body = bytearray()
+    for chunk in response.iter_content(READ_CHUNK_SIZE):
+        body.extend(chunk)
+        if len(body) > Config.WEB_MAX_RESPONSE_BYTES:
+            raise ResponseTooLarge(f"Response exceeds {Config.WEB_MAX_RESPONSE_BYTES} bytes")
+        # The read timeout is per socket read, this bounds a slow drip of data
+        if time.monotonic() > deadline:
+            raise requests.Timeout(f"Reading the response took longer than {Config.WEB_READ_TIMEOUT}s")
+    return bytes(body)
+
+
+def fetch_url(url):
+    """GET a URL through the pooled session, returning (status_code, body bytes).
+
+    Responses with an ETag or Last-Modified header are kept on disk and
+    revalidated with a conditional GET, so an unchanged page costs a 304.
+    """
+    meta, cached_body = _load_cached(url)
+    headers = {}
+    if meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    with outbound("web", "fetch"):
+        with session.get(
+            url,
+            headers=headers,
+            timeout=(Config.WEB_CONNECT_TIMEOUT, Config.WEB_READ_TIMEOUT),
+            stream=True,
+        ) as response:
+            if response.status_code == 304 and cached_body is not None:
+                record_cache("web", True)
+                _touch_cached(url)
+                return 200, cached_body
+            record_cache("web", False)
+            if response.status_code != 200:
+                return response.status_code, b""
+            body = _read_limited(response)
+
+    _store_cached(url, response, body)
+    return 200, body
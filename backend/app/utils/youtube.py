@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from youtube_transcript_api import YouTubeTranscriptApi
+
+from config import Config
+from app.utils.metrics import outbound, record_cache
+
+logger = logging.getLogger(__name__)
+
+VIDEO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{11}$")
+YOUTUBE_HOSTS = {"youtube.com", "m.youtube.com", "music.youtube.com", "youtube-nocookie.com"}
+# Path prefixes that are followed by the video id, e.g. /embed/<id>
+VIDEO_PATH_PREFIXES = {"embed", "v", "e", "shorts", "live"}
+
+CACHE_DIR = Path(Config.YOUTUBE_CACHE_DIR)
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def parse_youtube_video_id(url):
+    """Return the video id of a YouTube URL, or None when it is not one.
+
+    Handles watch?v=, youtu.be/, /embed/, /v/, /shorts/ and /live/ links,
+    with or without scheme, www. or extra query parameters.
+    """
+    if not url:
+        return None
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    segments = [segment for segment in parsed.path.split("/") if segment]
+
+    candidate = None
+    if host == "youtu.be":
+        candidate = segments[0] if segments else None
+    elif host in YOUTUBE_HOSTS:
+        query = parse_qs(parsed.query)
+        if query.get("v"):
+            candidate = query["v"][0]
+        elif len(segments) >= 2 and segments[0] in VIDEO_PATH_PREFIXES:
+            candidate = segments[1]
+    if candidate and VIDEO_ID_PATTERN.match(candidate):
+        return candidate
+    return None
+
+
+def get_transcript_segments(video_id, language="en"):
+    """Transcript segments ({start, duration, text}) of a video, cached on disk.
+
+    Entries are keyed by video id and language and refetched after
+    YOUTUBE_TRANSCRIPT_TTL seconds.
+    """
+    cache_path = CACHE_DIR / f"{video_id}_{language}.json"
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if time.time() - cached["fetched_at"] < Config.YOUTUBE_TRANSCRIPT_TTL:
+            record_cache("youtube", True)
+            return cached["segments"]
+    except (OSError, ValueError, KeyError):
+        pass
+    record_cache("youtube", False)
+
+    with outbound("youtube", "fetch"):
+        transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
+    segments = [
+        {"start": round(entry["start"], 2), "duration": round(entry.get("duration", 0), 2), "text": entry["text"]}
+        for entry in transcript
+    ]
+
+    # Unique temp name: threads of one process may cache the same video at once
+    temp_path = cache_path.with_name(f"{cache_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"video_id": video_id, "language": language, "fetched_at": time.time(),
+                       "segments": segments}, f, ensure_ascii=False)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not cache transcript of {video_id}: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+    return segments
+
+
+def format_offset(seconds):
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
@@ -0,0 +1,96 @@
+"""Check that the hot lookup queries use their indexes.
+
+    python benchmarks/check_query_plans.py
+
+Builds the schema with db.create_all() in an in-memory SQLite database, runs
+EXPLAIN QUERY PLAN on the source, chat, notebook, user and podcast lookups
+the controllers issue and exits non-zero when one of them no longer uses
+the expected index (e.g. after a model or migration change drops it), or
+when an ordered query sorts its rows instead of reading them in index order.
+"""
+import os
+import sys
+from pathlib import Path
+
+# Must be set before config.py is imported
+os.environ["DATABASE_URL"] = "sqlite://"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.dialects import sqlite  # noqa: E402
+
+from app import app, db  # noqa: E402
+from app.models.chat import Chat  # noqa: E402
+from app.models.notebook import Notebook  # noqa: E402
+from app.models.podcast import PodcastScript  # noqa: E402
+from app.models.source import Source  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+SOURCE_INDEXES = ("ix_source_notebook_id_created_at", "ux_source_notebook_id_title")
+
+
+def query_plan(query):
+    sql = str(query.statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+    return sql, " | ".join(row[-1] for row in rows)
+
+
+def checks():
+    # (description, query, acceptable index names); ORDERED checks must not sort
+    return [
+        ("sources of a notebook",
+         Source.query.filter_by(notebook_id=1), SOURCE_INDEXES),
+        ("sources of a notebook by creation time",
+         Source.query.filter_by(notebook_id=1).order_by(Source.created_at), ("ix_source_notebook_id_created_at",)),
+        ("source title lookup",
+         Source.query.filter_by(notebook_id=1, title="New Note"), ("ux_source_notebook_id_title",)),
+        ("selected sources of a notebook",
+         Source.query.filter(Source.id.in_([1, 2]), Source.notebook_id == 1), SOURCE_INDEXES + ("INTEGER PRIMARY KEY",)),
+        ("chat page",
+         Chat.query.filter_by(notebook_id=1).order_by(Chat.id.desc()).limit(51), ("ix_chat_notebook_id_id",)),
+        ("chat page before a cursor",
+         Chat.query.filter(Chat.notebook_id == 1, Chat.id < 100).order_by(Chat.id.desc()).limit(51),
+         ("ix_chat_notebook_id_id",)),
+        ("chat turns after the summary cursor",
+         Chat.query.filter(Chat.notebook_id == 1, Chat.id > 100).order_by(Chat.id.asc()), ("ix_chat_notebook_id_id",)),
+        ("chat messages since",
+         Chat.query.filter(Chat.notebook_id == 1, Chat.created_at > "2026-01-01"), ("ix_chat_notebook_id_created_at",)),
+        ("notebooks of a user",
+         Notebook.query.filter_by(user_id=1).order_by(Notebook.id), ("ix_notebook_user_id",)),
+        ("password reset token",
+         User.query.filter_by(reset_token="token"), ("ix_user_reset_token",)),
+        ("podcast scripts of a notebook",
+         PodcastScript.query.filter_by(notebook_id=1), ("ix_podcast_script_notebook_id",)),
+    ]
+
+
+# Queries whose ORDER BY the index has to serve; a temp B-tree means every
+# matching row is read and sorted before the LIMIT applies
+ORDERED = {
+    "sources of a notebook by creation time",
+    "chat page",
+    "chat page before a cursor",
+    "chat turns after the summary cursor",
+    "notebooks of a user",
+}
+
+
+def main():
+    failures = 0
+    with app.app_context():
+        db.create_all()
+        for description, query, indexes in checks():
+            sql, plan = query_plan(query)
+            sorted_in_memory = description in ORDERED and "USE TEMP B-TREE" in plan
+            ok = any(index in plan for index in indexes) and not sorted_in_memory
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {description}: {plan}")
+            if not ok:
+                expected = "no sort" if sorted_in_memory else f"one of {', '.join(indexes)}"
+                print(f"     expected {expected}\n     {sql}")
+    if failures:
+        raise SystemExit(f"{failures} queries do not use their index")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Throughput of normalize_text on multi-megabyte inputs.
+
+    python benchmarks/normalize_text_benchmark.py --sizes 1 8 32 --repeat 3
+
+Compares the previous five-pass implementation with the single-pass
+normalize_text and with normalize_text_stream fed 64 KB pieces, and checks
+that the streamed output matches the one-shot output.
+"""
+import argparse
+import importlib.util
+import random
+import re
+import time
+from pathlib import Path
+
+# Load the module by path so the benchmark does not start the Flask app
+_spec = importlib.util.spec_from_file_location(
+    "text_normalize", Path(__file__).resolve().parent.parent / "app" / "utils" / "text_normalize.py"
+)
+text_normalize = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(text_normalize)
+
+STREAM_PIECE_SIZE = 64 * 1024
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while researchers measure energy storage "
+    "capacity, grid reliability and cost per kilowatt hour across regions"
+).split()
+NOISE = ["•", "©", "—", "“", "”", "™", "→", "(", ")", "[", "]", ":", ";", "/", "%"]
+
+
+def legacy_normalize_text(text):
+    """The implementation normalize_text replaced, for comparison."""
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\r\n|\r', '\n', text)
+    text = re.sub(r'\n\s*\n', '\n\n', text)
+    text = re.sub(r'[^\w\s.,!?-]', '', text)
+    return text.strip()
+
+
+def make_document(size_bytes, seed=0):
+    """Extracted-PDF-like text: lines, blank lines, CRLFs, runs of spaces and symbols."""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < size_bytes:
+        words = []
+        for _ in range(rng.randint(8, 16)):
+            word = rng.choice(WORDS)
+            if rng.random() < 0.05:
+                word = rng.choice(NOISE) + word
+            words.append(word)
+        line = (" " if rng.random() < 0.9 else "   ").join(words)
+        line += rng.choice([".", ",", "", "!"]) + rng.choice(["\n", "\n", "\r\n", "\n\n", "  \n \n"])
+        parts.append(line)
+        size += len(line)
+    return "".join(parts)
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 8, 32], help="input sizes in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    def stream(text):
+        pieces = (text[i:i + STREAM_PIECE_SIZE] for i in range(0, len(text), STREAM_PIECE_SIZE))
+        return "".join(text_normalize.normalize_text_stream(pieces))
+
+    implementations = [
+        ("legacy 5-pass", legacy_normalize_text),
+        ("single-pass", text_normalize.normalize_text),
+        ("streamed 64KB", stream),
+    ]
+    print(f"{'size MB':>8}  {'implementation':<16}{'seconds':>10}{'MB/s':>10}")
+    for size_mb in args.sizes:
+        text = make_document(int(size_mb * 1024 * 1024))
+        megabytes = len(text.encode("utf-8")) / (1024 * 1024)
+        if stream(text) != text_normalize.normalize_text(text):
+            raise SystemExit("streamed output differs from normalize_text")
+        for name, func in implementations:
+            seconds = best_time(lambda: func(text), args.repeat)
+            print(f"{megabytes:>8.1f}  {name:<16}{seconds:>10.3f}{megabytes / seconds:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
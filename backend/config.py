@@ -5,6 +5,7 @@ load_dotenv()
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY')
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///rag.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
@@ -15,6 +16,36 @@ class Config:
     SMTP_EMAIL = os.getenv('SMTP_EMAIL')
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')  # e.g. http://localhost:8081/v1 for loadtest/fake_openai.py
     ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
     GOOGLE_CLOUD_CREDENTIALS = os.getenv('GOOGLE_CLOUD_CREDENTIALS')
-    AUDIO_STORAGE_PATH = os.getenv('AUDIO_STORAGE_PATH', 'audio')
\ No newline at end of file
+    AUDIO_STORAGE_PATH = os.getenv('AUDIO_STORAGE_PATH', 'audio')
+    PODCAST_CONTEXT_TOKEN_BUDGET = int(os.getenv('PODCAST_CONTEXT_TOKEN_BUDGET', 6000))  # tokens of source material per script
+    CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv('CHAT_CONTEXT_TOKEN_BUDGET', 3000))  # tokens of retrieved content per prompt
+    CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv('CHAT_HISTORY_TOKEN_BUDGET', 1500))  # tokens of dialogue history per prompt
+    CHAT_HISTORY_MAX_MESSAGES = int(os.getenv('CHAT_HISTORY_MAX_MESSAGES', 10))
+    ANSWER_CACHE_THRESHOLD = float(os.getenv('ANSWER_CACHE_THRESHOLD', 0.95))  # cosine similarity for a cache hit
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')  # collapsed-stack request profiles
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0.0))  # share of requests profiled without the X-Profile header
+    PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 5))
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 500))  # oldest profiles are deleted past this count
+    UPLOAD_SPOOL_THRESHOLD = int(os.getenv('UPLOAD_SPOOL_THRESHOLD', 20 * 1024 * 1024))  # uploads above this size are spooled to disk
+    OCR_TARGET_DPI = int(os.getenv('OCR_TARGET_DPI', 200))  # scans are downsampled to this before OCR
+    OCR_BATCH_SIZE = int(os.getenv('OCR_BATCH_SIZE', 8))  # images per readtext_batched call
+    OCR_WORKERS = int(os.getenv('OCR_WORKERS', 2))  # concurrent OCR batches per process
+    WEB_CONNECT_TIMEOUT = float(os.getenv('WEB_CONNECT_TIMEOUT', 5))  # seconds
+    WEB_READ_TIMEOUT = float(os.getenv('WEB_READ_TIMEOUT', 20))  # seconds, also caps the whole body download
+    WEB_MAX_RESPONSE_BYTES = int(os.getenv('WEB_MAX_RESPONSE_BYTES', 10 * 1024 * 1024))
+    WEB_POOL_SIZE = int(os.getenv('WEB_POOL_SIZE', 20))  # keep-alive connections per host
+    WEB_FETCH_CONCURRENCY = int(os.getenv('WEB_FETCH_CONCURRENCY', 8))
+    WEB_CACHE_DIR = os.getenv('WEB_CACHE_DIR', 'webcache')  # conditional-GET cache of fetched pages
+    WEB_CACHE_MAX_FILES = int(os.getenv('WEB_CACHE_MAX_FILES', 2000))  # least recently used pages are deleted past this count
+    YOUTUBE_CACHE_DIR = os.getenv('YOUTUBE_CACHE_DIR', 'youtubecache')
+    YOUTUBE_TRANSCRIPT_TTL = int(os.getenv('YOUTUBE_TRANSCRIPT_TTL', 7 * 24 * 3600))  # seconds before a cached transcript is refetched
+    BULK_INGEST_WORKERS = int(os.getenv('BULK_INGEST_WORKERS', 4))  # parallel extractions and summaries per process
+    BULK_INGEST_MAX_ITEMS = int(os.getenv('BULK_INGEST_MAX_ITEMS', 200))
+    BULK_INGEST_MAX_FILE_BYTES = int(os.getenv('BULK_INGEST_MAX_FILE_BYTES', 50 * 1024 * 1024))
+    BULK_INGEST_MAX_TOTAL_BYTES = int(os.getenv('BULK_INGEST_MAX_TOTAL_BYTES', 200 * 1024 * 1024))  # all files of one request, ZIP members counted inflated
+    PODCAST_TTS_CONCURRENCY = int(os.getenv('PODCAST_TTS_CONCURRENCY', 4))  # TTS worker threads shared by all podcast renders
+    TTS_FAILURE_THRESHOLD = int(os.getenv('TTS_FAILURE_THRESHOLD', 3))  # consecutive failures before a provider is skipped
+    TTS_COOLDOWN_SECONDS = int(os.getenv('TTS_COOLDOWN_SECONDS', 60))
\ No newline at end of file
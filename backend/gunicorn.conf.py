@@ -0,0 +1,53 @@
+# Production launcher: gunicorn -c gunicorn.conf.py app:app
+#
+# The app (and with it the SentenceTransformer, torch and EasyOCR models) is
+# imported once in the master and then forked, so workers share the model
+# pages copy-on-write instead of each loading its own copy. Each worker runs
+# the warm-up inference itself after the fork.
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_class = 'gthread'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 300))  # podcast generation can take minutes
+preload_app = True
+
+# Split the cores between workers so torch does not oversubscribe the CPU
+torch_threads = int(os.getenv('TORCH_THREADS_PER_WORKER', max(1, multiprocessing.cpu_count() // workers)))
+
+# Keep OpenMP from spinning up a full-size pool in the master before forking
+os.environ.setdefault('OMP_NUM_THREADS', str(torch_threads))
+os.environ.setdefault('MKL_NUM_THREADS', str(torch_threads))
+
+# Set PROMETHEUS_MULTIPROC_DIR to an empty directory so /metrics aggregates
+# every worker instead of reporting whichever one served the scrape
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app (and its models) is imported,
+    # before any fork. No inference runs here: it would start OpenMP and
+    # tokenizer thread pools, which do not survive a fork.
+    # Move the loaded objects out of the GC's reach so collections in the
+    # workers do not touch (and copy) the shared pages
+    gc.freeze()
+    server.log.info("Models loaded, forking workers")
+
+
+def post_fork(server, worker):
+    import torch
+    from app.utils.readiness import warm_up_models
+    torch.set_num_threads(torch_threads)
+    # First inference in the worker, with its own thread pools; /ready
+    # reports 200 for this worker once it is done
+    warm_up_models()
+    server.log.info(f"Worker {worker.pid} warm, using {torch_threads} torch threads")
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges from the shared metrics directory
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
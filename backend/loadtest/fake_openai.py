@@ -0,0 +1,169 @@
+"""Local stand-in for the OpenAI chat, embeddings and speech endpoints.
+
+Point the backend at it with OPENAI_BASE_URL=http://localhost:8081/v1 (any
+OPENAI_API_KEY works) to load-test without spending tokens:
+
+    python loadtest/fake_openai.py --port 8081 --latency-ms 800 --jitter-ms 200
+"""
+import argparse
+import hashlib
+import json
+import random
+import time
+import uuid
+
+import numpy as np
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+app = Flask(__name__)
+settings = argparse.Namespace(
+    latency_ms=500, jitter_ms=100, tokens_per_second=50, error_rate=0.0, audio_seconds=5
+)
+
+PODCAST_SPEAKERS = ["Host", "Alex", "Emma"]
+WORDS = (
+    "the source explains how the main idea connects to the examples and why "
+    "it matters for the overall argument of the document"
+).split()
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz), about 26 ms of audio
+SILENT_MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + bytes(413)
+
+
+def _sleep_latency():
+    delay = settings.latency_ms + random.uniform(-settings.jitter_ms, settings.jitter_ms)
+    time.sleep(max(delay, 0) / 1000)
+
+
+def _maybe_fail():
+    if random.random() < settings.error_rate:
+        return jsonify(error={"message": "Injected failure", "type": "server_error"}), 500
+    return None
+
+
+def _completion_text(messages):
+    prompt = " ".join(str(message.get("content", "")) for message in messages)
+    if "podcast" in prompt.lower():
+        paragraphs = []
+        for i in range(10):
+            speaker = PODCAST_SPEAKERS[i % len(PODCAST_SPEAKERS)]
+            paragraphs.append(f"{speaker}: " + " ".join(random.choices(WORDS, k=40)) + ".")
+        return "\n\n".join(paragraphs)
+    return " ".join(random.choices(WORDS, k=60)) + "."
+
+
+def _stream_completion(completion_id, model, text):
+    delay = 1 / settings.tokens_per_second if settings.tokens_per_second > 0 else 0
+    for word in text.split(" "):
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        time.sleep(delay)
+    done = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+    }
+    yield f"data: {json.dumps(done)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.route("/v1/chat/completions", methods=["POST"])
+def chat_completions():
+    data = request.get_json()
+    failure = _maybe_fail()
+    if failure:
+        return failure
+    _sleep_latency()
+    model = data.get("model", "gpt-4")
+    text = _completion_text(data.get("messages", []))
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    if data.get("stream"):
+        return Response(
+            stream_with_context(_stream_completion(completion_id, model, text)),
+            mimetype="text/event-stream",
+        )
+    tokens = len(text.split())
+    return jsonify({
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": tokens, "total_tokens": tokens},
+    })
+
+
+@app.route("/v1/embeddings", methods=["POST"])
+def embeddings():
+    data = request.get_json()
+    failure = _maybe_fail()
+    if failure:
+        return failure
+    _sleep_latency()
+    inputs = data.get("input", [])
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    dimensions = data.get("dimensions", 1536)
+    vectors = []
+    for i, text in enumerate(inputs):
+        # Deterministic per input so identical texts embed identically
+        seed = int.from_bytes(hashlib.sha256(str(text).encode("utf-8")).digest()[:4], "big")
+        vector = np.random.default_rng(seed).standard_normal(dimensions)
+        vector /= np.linalg.norm(vector)
+        vectors.append({"object": "embedding", "index": i, "embedding": vector.tolist()})
+    return jsonify({
+        "object": "list",
+        "data": vectors,
+        "model": data.get("model", "text-embedding-3-small"),
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    })
+
+
+@app.route("/v1/audio/speech", methods=["POST"])
+def audio_speech():
+    failure = _maybe_fail()
+    if failure:
+        return failure
+    _sleep_latency()
+    frames = max(int(settings.audio_seconds / 0.026), 1)
+
+    def generate():
+        # Streamed in roughly one-second pieces like the real endpoint
+        for start in range(0, frames, 38):
+            yield SILENT_MP3_FRAME * min(38, frames - start)
+
+    return Response(stream_with_context(generate()), mimetype="audio/mpeg")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=settings.latency_ms,
+                        help="time to first byte of every response")
+    parser.add_argument("--jitter-ms", type=float, default=settings.jitter_ms)
+    parser.add_argument("--tokens-per-second", type=float, default=settings.tokens_per_second,
+                        help="pace of streamed chat completions")
+    parser.add_argument("--error-rate", type=float, default=settings.error_rate,
+                        help="share of requests answered with a 500")
+    parser.add_argument("--audio-seconds", type=float, default=settings.audio_seconds,
+                        help="length of the silent audio returned by /audio/speech")
+    args = parser.parse_args()
+    for name in vars(settings):
+        setattr(settings, name, getattr(args, name))
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
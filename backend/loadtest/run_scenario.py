@@ -0,0 +1,211 @@
+"""Drive the register -> notebook -> sources -> chat -> podcast flow at a target rate.
+
+Run the backend against loadtest/fake_openai.py, then for example:
+
+    python loadtest/run_scenario.py --base-url http://localhost:5000 --rps 10 --users 40 --duration 120
+
+Requests from all virtual users share one pacer, so --rps is the offered
+request rate as long as enough users are free; the report shows the rate
+actually achieved, the error rate and latency percentiles per step.
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+SOURCE_TEXT = (
+    "Load test source {n} for run {run}. Renewable energy adoption depends on storage costs, "
+    "grid interconnection and local policy. Battery prices fell sharply over the last decade, "
+    "while transmission projects still take many years to permit and build. "
+) * 20
+
+
+class Pacer:
+    """Hands out evenly spaced start times at ``rate`` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            slot = max(self._next, time.monotonic())
+            self._next = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+        self.scenarios = 0
+        self._lock = threading.Lock()
+
+    def record(self, step, seconds, error=None):
+        with self._lock:
+            self.latencies[step].append(seconds)
+            if error:
+                self.errors[step] += 1
+                self.error_samples.setdefault(step, error)
+
+    def scenario_done(self):
+        with self._lock:
+            self.scenarios += 1
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class VirtualUser:
+    def __init__(self, args, pacer, stats):
+        self.args = args
+        self.pacer = pacer
+        self.stats = stats
+        self.client = httpx.Client(base_url=args.base_url, timeout=args.timeout)
+
+    def call(self, step, method, path, **kwargs):
+        self.pacer.wait()
+        start = time.perf_counter()
+        try:
+            response = self.client.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            self.stats.record(step, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+            return None
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            self.stats.record(step, elapsed, f"HTTP {response.status_code}: {response.text[:200]}")
+            return None
+        self.stats.record(step, elapsed)
+        return response
+
+    def run_scenario(self):
+        run = uuid.uuid4().hex[:12]
+        response = self.call("register", "POST", "/register", json={
+            "name": f"Load {run}", "email": f"load-{run}@example.com", "password": "loadtest-password",
+        })
+        if response is None:
+            return
+        self.client.headers["Authorization"] = f"Bearer {response.json()['token']}"
+
+        response = self.call("create_notebook", "POST", "/notebooks", json={"name": f"Load test {run}"})
+        if response is None:
+            return
+        notebook_id = response.json()["id"]
+
+        source_ids = []
+        for n in range(self.args.sources):
+            response = self.call("add_source", "POST", "/sources", json={
+                "notebook_id": notebook_id, "text": SOURCE_TEXT.format(n=n, run=run),
+            })
+            if response is None:
+                return
+            source_ids.append(response.json()["id"])
+
+        for _ in range(self.args.chats):
+            response = self.call("chat", "POST", "/chat", json={
+                "notebook_id": notebook_id,
+                "query": "What does the source say about storage costs?",
+                "source_ids": source_ids,
+            })
+            if response is None:
+                return
+
+        if self.args.podcast:
+            response = self.call("podcast", "POST", f"/api/podcast/generate/{notebook_id}", json={
+                "sources": source_ids,
+                "title": f"Load test {run}",
+                "podcastMode": "normal",
+                "personCount": 2,
+                "hasHost": True,
+            })
+            if response is None:
+                return
+        self.stats.scenario_done()
+
+    def loop(self, deadline):
+        try:
+            while time.monotonic() < deadline:
+                self.client.headers.pop("Authorization", None)
+                self.run_scenario()
+        finally:
+            self.client.close()
+
+
+def report(stats, elapsed):
+    total = sum(len(values) for values in stats.latencies.values())
+    errors = sum(stats.errors.values())
+    summary = {
+        "elapsed_s": round(elapsed, 1),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0,
+        "error_rate": round(errors / total, 4) if total else 0,
+        "scenarios_completed": stats.scenarios,
+        "steps": {},
+    }
+    for step, values in stats.latencies.items():
+        summary["steps"][step] = {
+            "count": len(values),
+            "errors": stats.errors[step],
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1),
+        }
+    return summary
+
+
+def print_report(summary, error_samples):
+    print(f"\n{summary['requests']} requests in {summary['elapsed_s']}s: "
+          f"{summary['throughput_rps']} req/s, error rate {summary['error_rate']:.2%}, "
+          f"{summary['scenarios_completed']} scenarios completed")
+    print(f"{'step':<16}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step, row in summary["steps"].items():
+        print(f"{step:<16}{row['count']:>8}{row['errors']:>8}{row['p50_ms']:>10}"
+              f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}")
+    for step, sample in error_samples.items():
+        print(f"first {step} error: {sample}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--rps", type=float, default=5, help="target request rate across all users")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to keep starting scenarios")
+    parser.add_argument("--sources", type=int, default=2, help="text sources added per notebook")
+    parser.add_argument("--chats", type=int, default=3, help="chat messages per notebook")
+    parser.add_argument("--no-podcast", dest="podcast", action="store_false")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    pacer = Pacer(args.rps)
+    stats = Stats()
+    start = time.monotonic()
+    deadline = start + args.duration
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        for _ in range(args.users):
+            pool.submit(VirtualUser(args, pacer, stats).loop, deadline)
+    elapsed = time.monotonic() - start
+
+    summary = report(stats, elapsed)
+    print_report(summary, stats.error_samples)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
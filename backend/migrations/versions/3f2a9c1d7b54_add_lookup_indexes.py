@@ -0,0 +1,58 @@
+"""Add indexes for hot lookups and a unique source title per notebook
+
+Revision ID: 3f2a9c1d7b54
+Revises: 
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b54'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_source_notebook_id_created_at', 'source', ['notebook_id', 'created_at'], False),
+    ('ux_source_notebook_id_title', 'source', ['notebook_id', 'title'], True),
+    ('ix_chat_notebook_id_created_at', 'chat', ['notebook_id', 'created_at'], False),
+    ('ix_notebook_user_id', 'notebook', ['user_id'], False),
+    ('ix_user_reset_token', 'user', ['reset_token'], False),
+    ('ix_podcast_script_notebook_id', 'podcast_script', ['notebook_id'], False),
+]
+
+
+def _existing_indexes(inspector, table):
+    if not inspector.has_table(table):
+        return None
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    # Rename existing duplicates so the unique index can be built
+    if inspector.has_table('source'):
+        op.execute(
+            "UPDATE source SET title = title || ' (' || id || ')' "
+            "WHERE id NOT IN (SELECT MIN(id) FROM source GROUP BY notebook_id, title)"
+        )
+
+    # Tables are created with db.create_all(), which already builds these
+    # indexes on fresh databases, so only add the missing ones
+    for name, table, columns, unique in INDEXES:
+        existing = _existing_indexes(inspector, table)
+        if existing is not None and name not in existing:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns, unique in reversed(INDEXES):
+        existing = _existing_indexes(inspector, table)
+        if existing and name in existing:
+            op.drop_index(name, table_name=table)
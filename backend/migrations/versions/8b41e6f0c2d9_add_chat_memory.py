@@ -0,0 +1,37 @@
+"""Add chat_memory table for rolling conversation summaries
+
+Revision ID: 8b41e6f0c2d9
+Revises: 3f2a9c1d7b54
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b41e6f0c2d9'
+down_revision = '3f2a9c1d7b54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('chat_memory'):
+        return
+    op.create_table(
+        'chat_memory',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('notebook_id', sa.Integer(), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=True),
+        sa.Column('summarized_upto_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['notebook_id'], ['notebook.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('notebook_id')
+    )
+
+
+def downgrade():
+    op.drop_table('chat_memory')
@@ -0,0 +1,47 @@
+"""Add podcast_script table for cached podcast scripts
+
+Revision ID: a91c4e7d2b38
+Revises: e2b8f4a6d153
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a91c4e7d2b38'
+down_revision = 'e2b8f4a6d153'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('podcast_script'):
+        op.create_table(
+            'podcast_script',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('notebook_id', sa.Integer(), nullable=False),
+            sa.Column('cache_key', sa.String(length=64), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=True),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('podcast_mode', sa.String(length=20), nullable=False),
+            sa.Column('person_count', sa.Integer(), nullable=False),
+            sa.Column('has_host', sa.Boolean(), nullable=True),
+            sa.Column('script', sa.Text(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['notebook_id'], ['notebook.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('cache_key')
+        )
+        op.create_index('ix_podcast_script_notebook_id', 'podcast_script', ['notebook_id'], unique=False)
+    elif 'ix_podcast_script_notebook_id' not in {index['name'] for index in inspector.get_indexes('podcast_script')}:
+        # 3f2a9c1d7b54 skipped the index when the table did not exist yet
+        op.create_index('ix_podcast_script_notebook_id', 'podcast_script', ['notebook_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_podcast_script_notebook_id', table_name='podcast_script')
+    op.drop_table('podcast_script')
@@ -0,0 +1,30 @@
+"""Add a (notebook_id, id) index for keyset-paged chat history
+
+Revision ID: b6e1d9f3a274
+Revises: d4f7b2c91e60
+Create Date: 2026-10-20 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1d9f3a274'
+down_revision = 'd4f7b2c91e60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # Chat pages and the conversation history are cut and ordered by id;
+    # ix_chat_notebook_id_created_at left a sort over the whole notebook
+    if inspector.has_table('chat') and 'ix_chat_notebook_id_id' not in {
+        index['name'] for index in inspector.get_indexes('chat')
+    }:
+        op.create_index('ix_chat_notebook_id_id', 'chat', ['notebook_id', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_chat_notebook_id_id', table_name='chat')
@@ -0,0 +1,38 @@
+"""Add notebook_digest table for cached source-set summaries
+
+Revision ID: c7d3a5e19f20
+Revises: 8b41e6f0c2d9
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d3a5e19f20'
+down_revision = '8b41e6f0c2d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('notebook_digest'):
+        return
+    op.create_table(
+        'notebook_digest',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('notebook_id', sa.Integer(), nullable=False),
+        sa.Column('source_set_key', sa.String(length=64), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('digest', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['notebook_id'], ['notebook.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('notebook_id', 'source_set_key', name='uq_notebook_digest_source_set')
+    )
+
+
+def downgrade():
+    op.drop_table('notebook_digest')
@@ -0,0 +1,39 @@
+"""Key cached answers by the conversation history they were given in
+
+Revision ID: d4f7b2c91e60
+Revises: a91c4e7d2b38
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f7b2c91e60'
+down_revision = 'a91c4e7d2b38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('answer_cache'):
+        return
+    if 'history_key' in {column['name'] for column in inspector.get_columns('answer_cache')}:
+        return
+    # Existing entries were only written for questions without a history
+    op.add_column('answer_cache', sa.Column('history_key', sa.String(length=64), nullable=False, server_default=''))
+    op.drop_index('ix_answer_cache_lookup', table_name='answer_cache')
+    op.create_index(
+        'ix_answer_cache_lookup', 'answer_cache',
+        ['notebook_id', 'source_set_key', 'language', 'history_key'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_answer_cache_lookup', table_name='answer_cache')
+    op.create_index('ix_answer_cache_lookup', 'answer_cache', ['notebook_id', 'source_set_key', 'language'], unique=False)
+    # SQLite can only drop a column by rebuilding the table
+    with op.batch_alter_table('answer_cache') as batch_op:
+        batch_op.drop_column('history_key')
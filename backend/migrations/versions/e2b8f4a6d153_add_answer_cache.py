@@ -0,0 +1,44 @@
+"""Add answer_cache table for semantic chat answer caching
+
+Revision ID: e2b8f4a6d153
+Revises: c7d3a5e19f20
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b8f4a6d153'
+down_revision = 'c7d3a5e19f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('answer_cache'):
+        return
+    op.create_table(
+        'answer_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('notebook_id', sa.Integer(), nullable=False),
+        sa.Column('source_set_key', sa.String(length=64), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('language', sa.String(length=20), nullable=False),
+        sa.Column('query', sa.Text(), nullable=False),
+        sa.Column('query_embedding', sa.JSON(), nullable=False),
+        sa.Column('reply', sa.Text(), nullable=False),
+        sa.Column('sources', sa.JSON(), nullable=True),
+        sa.Column('hit_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['notebook_id'], ['notebook.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_answer_cache_lookup', 'answer_cache', ['notebook_id', 'source_set_key', 'language'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_answer_cache_lookup', table_name='answer_cache')
+    op.drop_table('answer_cache')
@@ -1,4 +1,7 @@
 from app import app
+from app.utils.readiness import warm_up_models
 
+# Development server; use `gunicorn -c gunicorn.conf.py app:app` in production
 if __name__ == '__main__':
+    warm_up_models()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file